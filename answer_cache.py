@@ -0,0 +1,155 @@
+"""Lokaler Cache für Antworten auf wiederkehrende Regelfragen.
+
+Schlüssel ist die normalisierte Frage zusammen mit den ausgewählten Karten,
+der Regelversion und dem Modell. Optional werden auch fast gleiche Fragen
+beim selben Kartenkontext erkannt (Jaccard über Wortpaare, damit "A vor B"
+und "B vor A" verschieden bleiben). Abgelaufene Antworten und alles über
+max_rows werden beim Schreiben regelmäßig entfernt. Wie beim Karten-Cache
+ist die Datei optional: SQLite-Fehler (gesperrt, Platte voll, nur lesbar)
+gelten als Cache-Fehlschlag bzw. übersprungenes Schreiben.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_question(question):
+    """Kleinbuchstaben, ohne Satzzeichen, einfache Leerzeichen"""
+    return " ".join(WORD_PATTERN.findall(question.lower()))
+
+
+def context_key(card_names, rules_version, model):
+    """Schlüssel für den Kontext einer Frage (Kartenauswahl, Regelversion, Modell)"""
+    cards = "\n".join(sorted(name.lower() for name in card_names))
+    raw = f"{model}\n{rules_version}\n{cards}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def word_pairs(normalized):
+    """Aufeinanderfolgende Wortpaare einer normalisierten Frage (reihenfolgeabhängig)"""
+    words = normalized.split()
+    if len(words) < 2:
+        return set(words)
+    return set(zip(words, words[1:]))
+
+
+def jaccard(a, b):
+    """Ähnlichkeit zweier Token-Mengen (0..1)"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class AnswerCache:
+    """SQLite-basierter Antwort-Cache, geteilt von allen Worker-Prozessen"""
+
+    # Wie viele Einträge eines Kontexts für die Ähnlichkeitssuche geprüft werden
+    SIMILARITY_CANDIDATES = 200
+
+    def __init__(self, path, ttl=7 * 86400, similarity=None, max_rows=None, prune_interval=3600):
+        self.path = path
+        self.ttl = ttl
+        self.similarity = similarity
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self._prune_lock = threading.Lock()
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0, "errors": 0}
+        self._local = threading.local()
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS answers ("
+                    " context TEXT NOT NULL, question TEXT NOT NULL, answer TEXT NOT NULL,"
+                    " created_at REAL NOT NULL, PRIMARY KEY (context, question))"
+                )
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Antwort-Cache %s nicht nutzbar: %s", path, e)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, question, context):
+        """Gibt eine gecachte Antwort zurück (oder None, auch bei Fehlern der Datei)"""
+        try:
+            return self._lookup(question, context)
+        except sqlite3.Error as e:
+            self.stats["errors"] += 1
+            logger.warning("Antwort-Cache nicht lesbar: %s", e)
+            return None
+
+    def _lookup(self, question, context):
+        normalized = normalize_question(question)
+        min_created = time.time() - self.ttl
+        conn = self._connection()
+
+        row = conn.execute(
+            "SELECT answer FROM answers WHERE context = ? AND question = ? AND created_at >= ?",
+            (context, normalized, min_created)
+        ).fetchone()
+        if row is not None:
+            self.stats["hits"] += 1
+            return row[0]
+
+        if self.similarity:
+            pairs = word_pairs(normalized)
+            rows = conn.execute(
+                "SELECT question, answer FROM answers WHERE context = ? AND created_at >= ?"
+                " ORDER BY created_at DESC LIMIT ?",
+                (context, min_created, self.SIMILARITY_CANDIDATES)
+            ).fetchall()
+            best = max(rows, key=lambda r: jaccard(pairs, word_pairs(r[0])), default=None)
+            if best is not None and jaccard(pairs, word_pairs(best[0])) >= self.similarity:
+                self.stats["near_hits"] += 1
+                return best[1]
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, question, context, answer):
+        """Speichert eine Antwort (bei Fehlern der Datei wird nur nicht gespeichert)"""
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)",
+                    (context, normalize_question(question), answer, time.time())
+                )
+            self._maybe_prune()
+        except sqlite3.Error as e:
+            self.stats["errors"] += 1
+            logger.warning("Antwort-Cache nicht beschreibbar: %s", e)
+
+    def _maybe_prune(self):
+        # Höchstens alle prune_interval Sekunden pro Prozess
+        with self._prune_lock:
+            now = time.time()
+            if now < self._next_prune:
+                return
+            self._next_prune = now + self.prune_interval
+        self.prune()
+
+    def prune(self):
+        """Entfernt abgelaufene Antworten und die ältesten über max_rows"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl,))
+            if self.max_rows is not None:
+                conn.execute(
+                    "DELETE FROM answers WHERE rowid IN (SELECT rowid FROM answers"
+                    " ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,)
+                )
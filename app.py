@@ -3,6 +3,7 @@ from config import AppConfig
 from ui_components import UIComponents
 from chat_handler import ChatHandler
 from card_manager import CardManager
+from telemetry import span
 
 def main():
     """Hauptfunktion der MTG Judge App"""
@@ -10,8 +11,9 @@ def main():
     # 1. Seitenkonfiguration
     AppConfig.setup_page()
     
-    # 2. Session State initialisieren
+    # 2. Session State initialisieren, Metrik-Endpunkt (einmal pro Prozess)
     AppConfig.initialize_session_state()
+    AppConfig.start_metrics_server()
     
     # 3. UI-Komponenten initialisieren
     ui = UIComponents()
@@ -22,12 +24,17 @@ def main():
     ui.render_header()
     
     # 5. Karten-Management-Bereich
-    with st.expander("🎴 Karten-Auswahl verwalten", expanded=True):
-        card_mgr.render_card_search()
+    with span("render_cards"), st.expander("🎴 Karten-Auswahl verwalten", expanded=True):
+        search_tab, import_tab = st.tabs(["🔍 Suche", "📋 Deckliste importieren"])
+        with search_tab:
+            card_mgr.render_card_search()
+        with import_tab:
+            card_mgr.render_decklist_import()
         card_mgr.render_card_grid()
     
     # 6. Chat-Verlauf anzeigen
-    ui.render_chat_history()
+    with span("render_history"):
+        ui.render_chat_history()
     
     # 7. Chat-Eingabe verarbeiten
     if prompt := st.chat_input("Deine Regelfrage an den Mastermind..."):
@@ -0,0 +1,301 @@
+"""Benchmark und Qualitäts-Regressionstest für den Regelkontext.
+
+Spielt die Fragen aus benchmarks/questions.json gegen verschiedene
+Suchverfahren ab und misst Latenz (p50/p95/p99), Speicher-Allokationen,
+Prompt-Größe und Recall@k gegen die erwarteten Regelnummern. Läuft komplett
+offline: Kartendaten und Rulings kommen aus benchmarks/fixtures/scryfall.json
+(mit --record von Scryfall aufgenommen) oder, falls es die Datei nicht gibt,
+aus benchmarks/fixtures/synthetic.json. Die synthetischen Fixtures sind von
+Hand geschrieben (Oracle-Texte, erfundene IDs, keine Rulings); die Ausgabe
+weist darauf hin. Das LLM wird nicht aufgerufen (gemessen wird der fertige
+Prompt).
+
+    python benchmark.py                         # alle Verfahren
+    python benchmark.py --engine hybrid --k 5
+    python benchmark.py --json results.json     # Ergebnis speichern
+    python benchmark.py --baseline results.json # Regression gegen gespeichertes Ergebnis
+    python benchmark.py --record                # Fixtures neu von Scryfall aufnehmen
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from card_record import CardRecord
+from judge_core import build_prompt, format_rulings
+from rules_artifact import load_compiled_rules
+from rules_document import RULE_PATTERN
+from rules_retriever import RulesRetriever
+from settings import Settings
+from special_cases import SpecialCaseEngine
+
+BENCHMARK_DIR = "benchmarks"
+QUESTIONS_FILE = os.path.join(BENCHMARK_DIR, "questions.json")
+FIXTURES_FILE = os.path.join(BENCHMARK_DIR, "fixtures", "scryfall.json")
+SYNTHETIC_FIXTURES_FILE = os.path.join(BENCHMARK_DIR, "fixtures", "synthetic.json")
+ENGINES = ("linear", "bm25", "hybrid", "vectors")
+# Gewicht der Vektorsuche für das Verfahren "vectors" (hybrid plus N-Gramm-Vektoren)
+BENCHMARK_VECTOR_WEIGHT = 0.4
+# Erlaubter Rückgang beim Vergleich mit --baseline
+RECALL_TOLERANCE = 0.02
+LATENCY_TOLERANCE = 1.5
+
+
+def rule_number(text):
+    match = RULE_PATTERN.match(text)
+    return match.group(1) if match else None
+
+
+def covers(found, expected):
+    """Eine gefundene Regel deckt die erwartete ab, wenn sie gleich oder eine Unterregel ist"""
+    if not found:
+        return False
+    return found == expected or (found.startswith(expected) and not found[len(expected)].isdigit())
+
+
+def recall(found_numbers, expected):
+    if not expected:
+        return 1.0
+    hits = sum(1 for e in expected if any(covers(f, e) for f in found_numbers))
+    return hits / len(expected)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LinearEngine:
+    """Ursprüngliche Suche: Zeilen der rules.txt, die einen Suchbegriff enthalten"""
+
+    def __init__(self, rules_file, limit):
+        with open(rules_file, "r", encoding="utf-8") as f:
+            self.lines = f.readlines()
+        self.limit = limit
+
+    def _lines(self, question, card_names):
+        terms = [t.lower() for t in question.split() + list(card_names) if len(t) > 3]
+        found = []
+        for line in self.lines:
+            line_lower = line.lower()
+            if any(term in line_lower for term in terms):
+                found.append(line.strip())
+                if len(found) == self.limit:
+                    break
+        return found
+
+    def ranked(self, question, card_names, rule_refs, card_texts):
+        return [rule_number(line) for line in self._lines(question, card_names)]
+
+    def context(self, question, card_names, rule_refs, card_texts):
+        return "\n".join(self._lines(question, card_names))
+
+
+class RetrieverEngine:
+    """Index-basierte Suche (BM25 bzw. hybrid) wie in JudgeCore.rules_context"""
+
+    def __init__(self, retriever, limit, token_budget):
+        self.retriever = retriever
+        self.limit = limit
+        self.token_budget = token_budget
+
+    @staticmethod
+    def _query(question, card_names):
+        return " ".join([question] + list(card_names))
+
+    def ranked(self, question, card_names, rule_refs, card_texts):
+        doc_ids = self.retriever.ranked(
+            self._query(question, card_names), rule_refs, self.limit, card_texts
+        )
+        return [self.retriever.index.doc_numbers[doc_id] for doc_id in doc_ids]
+
+    def context(self, question, card_names, rule_refs, card_texts):
+        return "\n".join(self.retriever.retrieve(
+            self._query(question, card_names),
+            rule_refs=rule_refs,
+            token_budget=self.token_budget,
+            limit=self.limit,
+            card_texts=card_texts
+        ))
+
+
+def create_engine(name, compiled):
+    limit = Settings.RULES_CONTEXT_LIMIT
+    budget = Settings.RULES_CONTEXT_TOKEN_BUDGET
+    if name == "linear":
+        return LinearEngine(Settings.RULES_FILE, limit)
+    if name == "bm25":
+        return RetrieverEngine(RulesRetriever(compiled, vector_weight=0), limit, budget)
+    if name == "hybrid":
+        retriever = RulesRetriever.hybrid(compiled, vector_weight=Settings.RULES_VECTOR_WEIGHT)
+        return RetrieverEngine(retriever, limit, budget)
+    if name == "vectors":
+        retriever = RulesRetriever.hybrid(compiled, vector_weight=BENCHMARK_VECTOR_WEIGHT)
+        return RetrieverEngine(retriever, limit, budget)
+    raise ValueError(f"Unbekanntes Verfahren: {name}")
+
+
+def load_cases(fixtures):
+    engine = SpecialCaseEngine.load(Settings.SPECIAL_CASES_FILE)
+    cases = []
+    with open(QUESTIONS_FILE, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+    for item in questions:
+        cards = [CardRecord.from_card(fixtures["cards"][name]) for name in item["cards"]]
+        special = engine.applicable(cards)
+        cases.append({
+            **item,
+            "card_records": cards,
+            "special": special,
+            "rule_refs": special.references,
+            "card_texts": tuple(card.text for card in cards),
+        })
+    return cases
+
+
+def run_engine(engine, cases, rulings, k, repeat):
+    latencies = []
+    allocations = []
+    prompt_tokens = []
+    recalls = []
+    context_recalls = []
+    misses = []
+
+    for case in cases:
+        args = (case["question"], case["cards"], case["rule_refs"], case["card_texts"])
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            context = engine.context(*args)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        # Allokationen getrennt messen, tracemalloc verfälscht die Latenz
+        tracemalloc.start()
+        engine.context(*args)
+        allocations.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        # Derselbe Prompt wie im Judge, Rulings aus den Fixtures
+        rulings_by_id = {card.id: format_rulings(rulings.get(card.id)) for card in case["card_records"]}
+        prompt = build_prompt(case["question"], case["card_records"], case["special"], rulings_by_id, context)
+        prompt_tokens.append(prompt.tokens)
+
+        ranked = [n for n in engine.ranked(*args) if n][:k]
+        recalls.append(recall(ranked, case["expected_rules"]))
+        context_numbers = [rule_number(line) for line in context.split("\n")]
+        context_recalls.append(recall(context_numbers, case["expected_rules"]))
+        if recalls[-1] < 1.0:
+            misses.append(case["id"])
+
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "peak_alloc_kib": statistics.mean(allocations) / 1024,
+        "prompt_tokens_mean": statistics.mean(prompt_tokens),
+        "prompt_tokens_max": max(prompt_tokens),
+        f"recall@{k}": statistics.mean(recalls),
+        "context_recall": statistics.mean(context_recalls),
+        "misses": misses,
+    }
+
+
+def print_results(results, k):
+    columns = ("p50_ms", "p95_ms", "p99_ms", "peak_alloc_kib", "prompt_tokens_mean",
+               "prompt_tokens_max", f"recall@{k}", "context_recall")
+    print(f"{'engine':<8}" + "".join(f"{c:>20}" for c in columns))
+    for name, result in results.items():
+        print(f"{name:<8}" + "".join(f"{result[c]:>20.3f}" for c in columns))
+    for name, result in results.items():
+        if result["misses"]:
+            print(f"{name}: unvollständig bei {', '.join(result['misses'])}")
+
+
+def compare(results, baseline_file, k):
+    """Meldet Verschlechterungen gegenüber einem gespeicherten Lauf"""
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for metric in (f"recall@{k}", "context_recall"):
+            if metric in old and result[metric] < old[metric] - RECALL_TOLERANCE:
+                regressions.append(f"{name}: {metric} {old[metric]:.3f} -> {result[metric]:.3f}")
+        if result["p95_ms"] > old["p95_ms"] * LATENCY_TOLERANCE:
+            regressions.append(f"{name}: p95 {old['p95_ms']:.2f} ms -> {result['p95_ms']:.2f} ms")
+    return regressions
+
+
+def record_fixtures():
+    """Nimmt Kartendaten und Rulings aller Benchmark-Karten von Scryfall auf"""
+    from card_store import slim_card
+    from scryfall_client import ScryfallClient
+
+    with open(QUESTIONS_FILE, "r", encoding="utf-8") as f:
+        names = sorted({name for item in json.load(f) for name in item["cards"]})
+
+    client = ScryfallClient(Settings.SCRYFALL_BASE_URL)
+    found, not_found = client.collection([{"name": name} for name in names])
+    fixtures = {"cards": {}, "rulings": {}}
+    for card in found:
+        fixtures["cards"][card["name"]] = slim_card(card)
+        fixtures["rulings"][card["id"]] = client.rulings(card["id"]) or []
+
+    with open(FIXTURES_FILE, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, indent=2, ensure_ascii=False)
+    print(f"{len(found)} Karten aufgenommen, nicht gefunden: {not_found or '-'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--engine", choices=ENGINES + ("all",), default="all")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20, help="Wiederholungen pro Frage für die Latenz")
+    parser.add_argument("--json", help="Ergebnis als JSON speichern")
+    parser.add_argument("--baseline", help="Mit gespeichertem Ergebnis vergleichen")
+    parser.add_argument("--record", action="store_true", help="Fixtures von Scryfall neu aufnehmen")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixtures()
+        return 0
+
+    fixtures_file = FIXTURES_FILE if os.path.exists(FIXTURES_FILE) else SYNTHETIC_FIXTURES_FILE
+    with open(fixtures_file, "r", encoding="utf-8") as f:
+        fixtures = json.load(f)
+    cases = load_cases(fixtures)
+    compiled = load_compiled_rules(Settings.RULES_FILE, Settings.RULES_ARTIFACT_DIR)
+
+    names = ENGINES if args.engine == "all" else (args.engine,)
+    results = {
+        name: run_engine(create_engine(name, compiled), cases, fixtures["rulings"], args.k, args.repeat)
+        for name in names
+    }
+    print(f"{len(cases)} Fragen, {args.repeat} Wiederholungen, Regeln {compiled.version}")
+    if fixtures.get("synthetic"):
+        print(f"Synthetische Fixtures ({fixtures_file}): erfundene IDs, keine Rulings; "
+              "echte Daten mit --record aufnehmen")
+    else:
+        print(f"Fixtures: {fixtures_file}")
+    print_results(results, args.k)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.k)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
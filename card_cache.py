@@ -0,0 +1,168 @@
+"""Zweistufiger Cache für Scryfall-Daten (Karten-JSON, Rulings).
+
+Stufe 1 ist ein LRU im Prozess, Stufe 2 eine SQLite-Datei, die sich alle
+Worker-Prozesse auf einem Host teilen. "Nicht gefunden" wird ebenfalls
+(kürzer) gecacht, damit Tippfehler nicht jedes Mal Scryfall erreichen.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Markiert einen negativen Cache-Eintrag ("nicht gefunden")
+MISSING = object()
+
+
+class LRUCache:
+    """Threadsicherer LRU-Cache mit Ablaufzeit pro Eintrag"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Gibt den Wert zurück oder None, wenn kein gültiger Eintrag existiert"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CardCache:
+    """Cache für Scryfall-Antworten, geschlüsselt nach Namespace und Schlüssel"""
+
+    PRUNE_EVERY = 100  # Schreibvorgänge zwischen zwei Aufräumläufen
+
+    def __init__(self, path, memory_entries=2000, disk_entries=50000, ttl=86400, negative_ttl=600):
+        self.path = path
+        self.disk_entries = disk_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory = LRUCache(memory_entries)
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "negative_hits": 0, "misses": 0}
+        self._local = threading.local()
+        self._writes = 0
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT,"
+                    " expires_at REAL NOT NULL, stored_at REAL NOT NULL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache (stored_at)")
+
+    def _connection(self):
+        # SQLite-Verbindungen dürfen nicht zwischen Threads geteilt werden
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat):
+        self.stats[stat] += 1
+
+    def get(self, namespace, key):
+        """Gibt (Treffer, Wert) zurück; Wert ist None bei negativem Eintrag"""
+        value = self.memory.get((namespace, key))
+        if value is not None:
+            self._count("negative_hits" if value is MISSING else "memory_hits")
+            return True, None if value is MISSING else value
+
+        if self.path:
+            try:
+                row = self._connection().execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                    (namespace, key)
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+
+            if row is not None and row[1] >= time.time():
+                value = MISSING if row[0] is None else json.loads(row[0])
+                self.memory.set((namespace, key), value, row[1])
+                self._count("negative_hits" if value is MISSING else "disk_hits")
+                return True, None if value is MISSING else value
+
+        self._count("misses")
+        return False, None
+
+    def set(self, namespace, key, value, ttl=None):
+        """Speichert einen Wert; value=None legt einen negativen Eintrag an"""
+        if value is None:
+            ttl = self.negative_ttl
+        expires_at = time.time() + (ttl or self.ttl)
+        self.memory.set((namespace, key), MISSING if value is None else value, expires_at)
+
+        if not self.path:
+            return
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, None if value is None else json.dumps(value),
+                     expires_at, time.time())
+                )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self.prune()
+        except sqlite3.Error:
+            # Der Festplatten-Cache ist optional, Fehler dürfen die App nicht stören
+            pass
+
+    def prune(self):
+        """Entfernt abgelaufene Einträge und die ältesten über dem Größenlimit"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM cache WHERE rowid IN ("
+                " SELECT rowid FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.disk_entries,)
+            )
+
+    def get_or_fetch(self, namespace, key, fetch, ttl=None):
+        """Gibt den gecachten Wert zurück oder lädt ihn über fetch() nach.
+
+        fetch() liefert None für "nicht gefunden" (wird negativ gecacht);
+        Exceptions werden nicht gecacht und weitergereicht.
+        """
+        hit, value = self.get(namespace, key)
+        if hit:
+            return value
+        value = fetch()
+        self.set(namespace, key, value, ttl)
+        return value
+
+    def hit_rate(self):
+        """Anteil der Anfragen, die aus dem Cache beantwortet wurden"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["negative_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
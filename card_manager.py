@@ -1,7 +1,10 @@
 import streamlit as st
-import requests
 from streamlit_searchbox import st_searchbox
 from config import AppConfig
+from card_record import CardRecord
+from decklist import parse_decklist
+from mtg_logic import MTGLogic
+from telemetry import span
 from ui_components import UIComponents
 
 class CardManager:
@@ -9,55 +12,75 @@ class CardManager:
     
     def __init__(self):
         self.ui = UIComponents()
+        self.judge = MTGLogic.get_judge()
         self.search_key = "card_search"
     
     def search_scryfall(self, searchterm: str):
-        """Sucht Karten auf Scryfall (Autocomplete)"""
+        """Sucht Karten im lokalen Bestand, sonst auf Scryfall (Autocomplete über den Judge)"""
         if len(searchterm) < 3:
             return []
         
         try:
-            url = f"{AppConfig.SCRYFALL_BASE_URL}/cards/autocomplete?q={searchterm}"
-            res = requests.get(url, timeout=5)
-            
-            if res.status_code == 200:
-                return res.json().get("data", [])
+            return self.judge.autocomplete(searchterm)
         except Exception as e:
             st.error(f"Fehler bei der Kartensuche: {e}")
             return []
-        
-        return []
     
     def fetch_card_details(self, card_name):
-        """Holt detaillierte Karteninformationen von Scryfall"""
+        """Holt detaillierte Karteninformationen über den Judge (lokaler Bestand, Cache oder Scryfall)"""
         try:
-            url = f"{AppConfig.SCRYFALL_BASE_URL}/cards/named?exact={card_name}"
-            res = requests.get(url, timeout=5)
-            
-            if res.status_code == 200:
-                return res.json()
-            else:
-                st.error(f"Karte '{card_name}' nicht gefunden.")
-                return None
+            with span("card_lookup"):
+                cards, _ = self.judge.resolve_cards([card_name])
         except Exception as e:
             st.error(f"Fehler beim Laden der Karte: {e}")
             return None
+        
+        if not cards:
+            st.error(f"Karte '{card_name}' nicht gefunden.")
+            return None
+        return cards[0]
+    
+    def resolve_cards(self, card_names):
+        """Löst viele Kartennamen auf einmal auf (über den Judge, ggf. die Judge-API).
+        
+        Gibt (gefundene Karten in Eingabereihenfolge, nicht gefundene Namen) zurück.
+        """
+        return self.judge.resolve_cards(card_names)
     
     def add_card(self, card_data):
-        """Fügt eine Karte zur Auswahl hinzu"""
-        if card_data and card_data not in st.session_state.my_cards:
-            # Prüfen ob Karte schon existiert (nach Name)
-            if card_data['name'] not in [c['name'] for c in st.session_state.my_cards]:
-                st.session_state.my_cards.append(card_data)
-                return True
-        return False
+        """Fügt eine Karte zur Auswahl hinzu (als kompakter Record, ohne Duplikate)"""
+        return bool(self.add_cards([card_data]))
     
-    def remove_card(self, index):
+    def add_cards(self, cards):
+        """Fügt mehrere Karten hinzu; Bilder und Spezialregeln einmal für alle neuen Karten"""
+        records = []
+        for card_data in cards:
+            if not card_data or card_data['name'] in st.session_state.my_cards:
+                continue
+            record = CardRecord.from_card(card_data)
+            st.session_state.my_cards[card_data['name']] = record
+            records.append(record)
+        
+        if records:
+            self.ui.prefetch_images(records)
+            self.update_special_cases()
+        return records
+    
+    def remove_card(self, name):
         """Entfernt eine Karte aus der Auswahl"""
-        if 0 <= index < len(st.session_state.my_cards):
-            st.session_state.my_cards.pop(index)
-            return True
-        return False
+        if st.session_state.my_cards.pop(name, None) is None:
+            return False
+        self.update_special_cases()
+        return True
+    
+    def update_special_cases(self):
+        """Berechnet die Spezialregeln der aktuellen Auswahl (Karten, Schlüsselwörter, Paare)"""
+        # Mit Judge-API berechnet sie der Server (gemerkt pro Kartenauswahl)
+        if AppConfig.JUDGE_API_URL:
+            return
+        st.session_state.special_cases = MTGLogic.get_special_case_engine().applicable(
+            st.session_state.my_cards.values()
+        )
     
     def render_card_search(self):
         """Rendert die Kartensuche"""
@@ -76,6 +99,38 @@ class CardManager:
                     del st.session_state[self.search_key]
                 st.rerun()
     
+    def render_decklist_import(self):
+        """Rendert den Import für eingefügte Decklisten / Board States"""
+        feedback = st.session_state.pop("import_feedback", None)
+        if feedback:
+            added, not_found = feedback
+            if added:
+                self.ui.render_success(f"{added} Karten hinzugefügt.")
+            if not_found:
+                self.ui.render_error(f"Nicht gefunden: {', '.join(not_found)}")
+        
+        with st.form("decklist_import", clear_on_submit=True):
+            text = st.text_area(
+                "Deckliste einfügen",
+                placeholder="4 Lightning Bolt\n1 Blood Moon\n...",
+                height=150
+            )
+            submitted = st.form_submit_button("📋 Importieren")
+        
+        if submitted and text.strip():
+            names = parse_decklist(text)
+            try:
+                with st.spinner(f"Lade {len(names)} Karten..."):
+                    cards, not_found = self.resolve_cards(names)
+            except Exception as e:
+                self.ui.render_error(f"Fehler beim Import: {e}")
+                return
+            
+            added = len(self.add_cards(cards))
+            # Alle Karten auf einmal übernehmen, dann ein einziger Rerun
+            st.session_state.import_feedback = (added, not_found)
+            st.rerun()
+    
     def render_card_grid(self, columns=6):
         """Rendert das Karten-Grid mit allen ausgewählten Karten"""
         if not st.session_state.my_cards:
@@ -84,29 +139,22 @@ class CardManager:
         
         cols = st.columns(columns)
         
-        for i, card in enumerate(st.session_state.my_cards):
+        for i, card in enumerate(st.session_state.my_cards.values()):
             with cols[i % columns]:
                 self.ui.render_card_image(card, width=150)
                 
                 # Kartenname unter dem Bild
-                st.caption(card.get('name', 'Unbekannt'))
+                st.caption(card.name)
                 
-                # Löschen-Button
-                if st.button("🗑️ Löschen", key=f"del_{i}"):
-                    self.remove_card(i)
+                # Löschen-Button (Schlüssel bleibt beim Löschen anderer Karten stabil)
+                if st.button("🗑️ Löschen", key=f"del_{card.id}"):
+                    self.remove_card(card.name)
                     st.rerun()
     
+    def get_cards(self):
+        """Gibt die ausgewählten Karten als CardRecords zurück"""
+        return list(st.session_state.my_cards.values())
+    
     def get_card_names(self):
         """Gibt eine Liste aller Kartennamen zurück"""
-        return [card['name'] for card in st.session_state.my_cards]
-    
-    def get_card_links(self):
-        """Erstellt eine formatierte Liste mit Karten-Links für die KI"""
-        links = []
-        for card in st.session_state.my_cards:
-            name = card['name']
-            url = card.get('scryfall_uri', '')
-            if url:
-                links.append(f"- {name}: {url}")
-        
-        return "\n".join(links) if links else "Keine Karten ausgewählt."
+        return list(st.session_state.my_cards)
@@ -0,0 +1,85 @@
+"""Kompakte Kartendaten für den Session State.
+
+Pro ausgewählter Karte werden nur die Felder gehalten, die Prompt und Grid
+brauchen. Vollständige Kartendaten liegen im gemeinsamen Cache bzw. im
+lokalen Kartenbestand und werden bei Bedarf über die ID nachgeladen.
+"""
+from image_cache import image_url
+
+
+class CardFace:
+    """Eine Seite einer mehrseitigen Karte"""
+
+    __slots__ = ("name", "mana_cost", "type_line", "oracle_text")
+
+    def __init__(self, name, mana_cost="", type_line="", oracle_text=""):
+        self.name = name
+        self.mana_cost = mana_cost
+        self.type_line = type_line
+        self.oracle_text = oracle_text
+
+
+class CardRecord:
+    """Ausgewählte Karte: IDs, Texte, Schlüsselwörter, Link und Bildschlüssel"""
+
+    __slots__ = (
+        "id", "oracle_id", "name", "mana_cost", "type_line", "oracle_text", "power",
+        "toughness", "keywords", "scryfall_uri", "image_url", "faces",
+    )
+
+    def __init__(self, id, name, oracle_id=None, mana_cost="", type_line="", oracle_text="",
+                 power="", toughness="", keywords=(), scryfall_uri="", image_url=None, faces=()):
+        self.id = id
+        self.oracle_id = oracle_id
+        self.name = name
+        self.mana_cost = mana_cost
+        self.type_line = type_line
+        self.oracle_text = oracle_text
+        self.power = power
+        self.toughness = toughness
+        self.keywords = keywords
+        self.scryfall_uri = scryfall_uri
+        # Normal-Bild inkl. Versions-Parameter, Schlüssel für den Bild-Cache
+        self.image_url = image_url
+        self.faces = faces
+
+    @classmethod
+    def from_card(cls, card):
+        """Erstellt einen Record aus einem (ggf. vollständigen) Scryfall-Kartenobjekt"""
+        faces = tuple(
+            CardFace(
+                face.get("name", ""),
+                face.get("mana_cost", ""),
+                face.get("type_line", ""),
+                face.get("oracle_text", ""),
+            )
+            for face in card.get("card_faces", [])
+        )
+        return cls(
+            card["id"],
+            card["name"],
+            oracle_id=card.get("oracle_id"),
+            mana_cost=card.get("mana_cost", ""),
+            type_line=card.get("type_line", ""),
+            oracle_text=card.get("oracle_text", ""),
+            power=card.get("power", ""),
+            toughness=card.get("toughness", ""),
+            keywords=tuple(card.get("keywords", ())),
+            scryfall_uri=card.get("scryfall_uri", ""),
+            image_url=image_url(card),
+            faces=faces,
+        )
+
+    @property
+    def text(self):
+        """Oracle-Text, bei mehrseitigen Karten aller Seiten"""
+        if self.oracle_text or not self.faces:
+            return self.oracle_text
+        return "\n//\n".join(f"{face.name}: {face.oracle_text}" for face in self.faces)
+
+    @property
+    def face_names(self):
+        return [face.name for face in self.faces]
+
+    def __repr__(self):
+        return f"CardRecord({self.name!r}, {self.id!r})"
@@ -0,0 +1,218 @@
+"""Offline-Kartenbestand aus einem Scryfall-Bulk-Dump (z.B. oracle-cards).
+
+Dump herunterladen bzw. aktualisieren:
+    python card_store.py [zieldatei]
+
+Mehrere Prozesse (API-Worker, Streamlit) können sich eine Datei teilen: nur
+wer das Download-Lock bekommt, lädt herunter; alle anderen lesen die ersetzte
+Datei bei ihrer nächsten Prüfung neu ein.
+"""
+import bisect
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Felder, die aus dem Dump übernommen werden (Preise, Legalitäten etc. entfallen)
+STORE_FIELDS = (
+    "id", "oracle_id", "name", "lang", "layout", "mana_cost", "cmc", "type_line",
+    "oracle_text", "power", "toughness", "loyalty", "defense", "colors",
+    "color_identity", "keywords", "scryfall_uri", "image_uris", "card_faces",
+    "rulings_uri",
+)
+
+# Ein älteres Download-Lock gilt als verwaist (Prozess abgestürzt), Sekunden
+DOWNLOAD_LOCK_STALE = 3600
+
+
+def normalize_name(name):
+    """Normalisiert einen Kartennamen für Vergleiche (klein, ohne Akzente)"""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.lower().split())
+
+
+def slim_card(card):
+    """Reduziert ein Scryfall-Kartenobjekt auf die benötigten Felder"""
+    return {key: card[key] for key in STORE_FIELDS if key in card}
+
+
+class CardStore:
+    """Kartenbestand im Speicher mit Autocomplete über ein sortiertes Namens-Array.
+
+    Jeder Name wird ab jedem Wortanfang eingetragen ("Grist, the Hunger Tide"
+    findet man also auch über "hunger"); eine Suche ist eine binäre Suche.
+    """
+
+    def __init__(self, cards=(), source=None):
+        self.source = source
+        self.loaded_at = None
+        # Änderungszeit der Datei beim letzten Einlesen
+        self.source_mtime = None
+        self._replace(cards)
+
+    def _replace(self, cards):
+        by_id = {}
+        by_name = {}
+        keys = []
+        for card in cards:
+            card = slim_card(card)
+            by_id[card["id"]] = card
+            names = [card["name"]] + [face["name"] for face in card.get("card_faces", [])]
+            for name in names:
+                normalized = normalize_name(name)
+                by_name.setdefault(normalized, card)
+                words = normalized.split(" ")
+                for start in range(len(words)):
+                    # (Suchschlüssel, Wortposition, angezeigter Name)
+                    keys.append((" ".join(words[start:]), start, card["name"]))
+        keys.sort()
+
+        # Eine einzige Zuweisung, damit Leser nie einen halben Stand sehen
+        self._data = (by_id, by_name, keys)
+        self.loaded_at = datetime.now(timezone.utc)
+
+    @classmethod
+    def load(cls, path):
+        """Lädt einen Bulk-Dump (leerer Bestand, wenn die Datei fehlt)"""
+        store = cls(source=path)
+        if os.path.exists(path):
+            store.reload()
+        return store
+
+    def reload(self):
+        """Liest den Dump von der Platte neu ein"""
+        mtime = os.path.getmtime(self.source)
+        with open(self.source, "r", encoding="utf-8") as f:
+            self._replace(json.load(f))
+        self.source_mtime = mtime
+        logger.info("Kartenbestand geladen: %s Karten aus %s", len(self), self.source)
+
+    def __len__(self):
+        return len(self._data[0])
+
+    def __bool__(self):
+        return bool(self._data[0])
+
+    def get_by_id(self, card_id):
+        return self._data[0].get(card_id)
+
+    def get_by_name(self, name):
+        """Sucht eine Karte über den exakten (normalisierten) Namen"""
+        return self._data[1].get(normalize_name(name))
+
+    def autocomplete(self, term, limit=20):
+        """Gibt Kartennamen zurück, deren Name (oder ein Wort darin) mit term beginnt"""
+        prefix = normalize_name(term)
+        if not prefix:
+            return []
+
+        keys = self._data[2]
+        start = bisect.bisect_left(keys, (prefix,))
+        matches = []
+        for i in range(start, len(keys)):
+            key, position, name = keys[i]
+            if not key.startswith(prefix):
+                break
+            matches.append((position > 0, len(name), name))
+
+        # Treffer am Namensanfang zuerst, dann kürzere Namen
+        results = []
+        for _, _, name in sorted(matches):
+            if name not in results:
+                results.append(name)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def reload_if_changed(self):
+        """Liest den Dump neu ein, wenn die Datei seit dem letzten Einlesen ersetzt wurde"""
+        if not os.path.exists(self.source) or os.path.getmtime(self.source) == self.source_mtime:
+            return False
+        self.reload()
+        return True
+
+    def refresh(self, client, bulk_type="oracle-cards"):
+        """Hält den Bestand aktuell; True, wenn er neu eingelesen wurde.
+
+        Ein neuerer Dump wird nur von einem Prozess heruntergeladen (Lock-Datei),
+        eine von einem anderen Prozess ersetzte Datei wird nur neu eingelesen.
+        """
+        reloaded = self.reload_if_changed()
+
+        info = client.bulk_data(bulk_type)
+        if info is None:
+            raise ValueError(f"Unbekannter Bulk-Typ: {bulk_type}")
+
+        updated_at = datetime.fromisoformat(info["updated_at"].replace("Z", "+00:00"))
+        if os.path.exists(self.source):
+            modified = datetime.fromtimestamp(os.path.getmtime(self.source), timezone.utc)
+            if modified >= updated_at:
+                return reloaded
+
+        directory = os.path.dirname(self.source) or "."
+        os.makedirs(directory, exist_ok=True)
+        lock_path = self.source + ".lock"
+        if not self._acquire_lock(lock_path):
+            return reloaded  # Ein anderer Prozess lädt gerade herunter
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    client.download(info["download_uri"], f)
+                os.replace(tmp_path, self.source)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        finally:
+            os.remove(lock_path)
+
+        self.reload()
+        return True
+
+    @staticmethod
+    def _acquire_lock(path):
+        """Legt die Lock-Datei exklusiv an (räumt verwaiste Locks vorher weg)"""
+        try:
+            if time.time() - os.path.getmtime(path) > DOWNLOAD_LOCK_STALE:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        return True
+
+    def start_refresh(self, client, interval, bulk_type="oracle-cards"):
+        """Aktualisiert den Dump regelmäßig in einem Hintergrund-Thread"""
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.refresh(client, bulk_type)
+                except Exception as e:
+                    logger.warning("Aktualisierung des Kartenbestands fehlgeschlagen: %s", e)
+
+        stop = threading.Event()
+        threading.Thread(target=run, name="card-store-refresh", daemon=True).start()
+        return stop
+
+
+if __name__ == "__main__":
+    from settings import Settings
+    from scryfall_client import ScryfallClient
+
+    target = sys.argv[1] if len(sys.argv) > 1 else Settings.SCRYFALL_BULK_FILE
+    store = CardStore.load(target)
+    client = ScryfallClient(Settings.SCRYFALL_BASE_URL, rate_limit=Settings.SCRYFALL_RATE_LIMIT)
+    updated = store.refresh(client, Settings.SCRYFALL_BULK_TYPE)
+    print(f"Kartenbestand {'aktualisiert' if updated else 'aktuell'}: {len(store)} Karten in {target}")
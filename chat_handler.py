@@ -1,104 +1,32 @@
 import streamlit as st
-from openai import OpenAI
 from config import AppConfig
 from card_manager import CardManager
 from mtg_logic import MTGLogic
-from database import SYSTEM_GUIDELINES, SPECIAL_CASES
+from chat_history import compact_history
+from telemetry import trace
 
 class ChatHandler:
-    """Verwaltet die Chat-Funktionalität und KI-Interaktion"""
+    """Verwaltet die Chat-Funktionalität; Antworten kommen vom Judge (Kern oder API)"""
     
     def __init__(self):
-        self.client = OpenAI(
-            api_key=AppConfig.get_api_key(),
-            base_url=AppConfig.API_BASE_URL
-        )
+        self.judge = MTGLogic.get_judge()
         self.card_manager = CardManager()
-        self.mtg_logic = MTGLogic()
     
-    def build_system_message(self, prompt):
-        """Baut die System-Nachricht für die KI"""
-        
-        # Karten-Links für Verlinkung
-        card_links = self.card_manager.get_card_links()
-        
-        # Karten-Informationen (Oracle Text + Rulings)
-        card_info_list = []
-        special_rules = []
-        
-        for card in st.session_state.my_cards:
-            card_name = card['name']
-            
-            # Spezialregeln prüfen
-            if card_name in SPECIAL_CASES:
-                special_rules.append(
-                    f"\n!!! SPEZIALREGEL FÜR {card_name}:\n{SPECIAL_CASES[card_name]}\n"
-                )
-            
-            # Oracle Text und Rulings
-            oracle_text = card.get('oracle_text', 'Kein Text verfügbar')
-            rulings = self.mtg_logic.get_scryfall_rulings(card['id'])
-            
-            card_info_list.append(
-                f"CARD: {card_name}\n"
-                f"TEXT: {oracle_text}\n"
-                f"RULINGS: {rulings}"
-            )
-        
-        card_info = "\n\n".join(card_info_list)
-        active_special = "\n".join(special_rules)
-        
-        # Regelkontext aus rules.txt
-        card_names = self.card_manager.get_card_names()
-        rules_context = self.mtg_logic.get_rules_context(
-            prompt, 
-            card_names, 
-            st.session_state.rules_lines
-        )
-        
-        # System-Prompt zusammenbauen
-        system_message = f"""Du bist Monster Magic Mastermind.
-
-{SYSTEM_GUIDELINES}
-
-VERLINKUNGS-PFLICHT:
-Nutze für JEDE genannte Karte aus der Liste unten das Format: [Kartenname](URL)
-Verwende EXAKT die URLs, die hier stehen. Erfinde niemals eigene URLs!
-
-DEINE LINK-DATENBANK:
-{card_links}
-
-PRIORITÄT:
-1. SPEZIALREGELN (höchste Priorität): {active_special}
-2. KARTEN-DETAILS: {card_info}
-3. REGELKONTEXT: {rules_context}
-"""
-        
-        return system_message
+    def handle_user_message(self, prompt):
+        """Verarbeitet eine Benutzernachricht (mit Trace über alle Abschnitte)"""
+        with trace("chat", cards=len(st.session_state.my_cards)):
+            self._handle_user_message(prompt)
     
-    def stream_ai_response(self, system_message):
-        """Streamt die Antwort der KI"""
+    def _handle_user_message(self, prompt):
+        """Frage an den Judge, Streaming und Verlauf einer Benutzernachricht"""
         
-        messages = [
-            {"role": "system", "content": system_message}
-        ] + st.session_state.messages
+        # Eine noch laufende Antwort dieser Session abbrechen
+        previous = st.session_state.pop("active_stream", None)
+        if previous is not None:
+            previous.cancel()
         
-        try:
-            response = self.client.chat.completions.create(
-                model=AppConfig.MODEL_NAME,
-                messages=messages,
-                stream=True
-            )
-            
-            for chunk in response:
-                if chunk.choices[0].delta.content is not None:
-                    yield chunk.choices[0].delta.content
-                    
-        except Exception as e:
-            yield f"\n\n❌ Fehler bei der KI-Anfrage: {str(e)}"
-    
-    def handle_user_message(self, prompt):
-        """Verarbeitet eine Benutzernachricht"""
+        # Bisheriger Verlauf ohne die neue Frage
+        history = list(st.session_state.messages)
         
         # Nachricht zum Verlauf hinzufügen
         st.session_state.messages.append({
@@ -110,17 +38,55 @@ PRIORITÄT:
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # KI-Antwort generieren
+        # KI-Antwort generieren (Cache, Prompt und LLM-Anfrage im Judge)
         with st.chat_message("assistant"):
-            system_message = self.build_system_message(prompt)
-            
-            # Streaming der Antwort
-            full_response = st.write_stream(
-                self.stream_ai_response(system_message)
+            answer = self.judge.answer(
+                prompt,
+                self.card_manager.get_cards(),
+                history,
+                st.session_state.history_summary,
+                st.session_state.special_cases
             )
+            st.session_state.active_stream = answer
+            try:
+                full_response = st.write_stream(answer)
+            finally:
+                # Greift auch, wenn Streamlit das Skript bei einem Rerun unterbricht
+                answer.close()
+                if st.session_state.get("active_stream") is answer:
+                    del st.session_state["active_stream"]
             
-            # Antwort zum Verlauf hinzufügen
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": full_response
-            })
+            if answer.cached:
+                st.caption("⚡ Antwort aus dem Cache")
+            elif answer.prompt_tokens is not None:
+                # Prompt-Größe dieser Anfrage anzeigen
+                st.session_state.last_prompt_tokens = answer.prompt_tokens
+                hint = f" (gekürzt: {', '.join(answer.truncated)})" if answer.truncated else ""
+                st.caption(f"Prompt: ~{answer.prompt_tokens} Tokens{hint}")
+            if answer.not_found:
+                st.caption(f"Nicht geladen: {', '.join(answer.not_found)}")
+        
+        # Antwort zum Verlauf hinzufügen
+        st.session_state.messages.append({
+            "role": "assistant",
+            "content": full_response
+        })
+        
+        self.compact_history()
+    
+    def compact_history(self):
+        """Fasst ältere Runden zusammen und begrenzt den gespeicherten Verlauf"""
+        messages, summary, archived = compact_history(
+            st.session_state.messages,
+            st.session_state.history_summary,
+            AppConfig.HISTORY_KEEP_TURNS,
+            AppConfig.HISTORY_SUMMARY_TOKENS
+        )
+        if not archived:
+            return
+        
+        st.session_state.messages = messages
+        st.session_state.history_summary = summary
+        st.session_state.archived_messages = (
+            st.session_state.archived_messages + archived
+        )[-AppConfig.HISTORY_MAX_ARCHIVED:]
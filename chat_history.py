@@ -0,0 +1,65 @@
+"""Verdichtung des Chat-Verlaufs für lange Judge-Sessions.
+
+Die letzten Runden (Frage + Antwort) bleiben wörtlich erhalten, ältere werden
+in eine fortlaufende Zusammenfassung übernommen. Die Zusammenfassung wird
+lokal und ohne LLM-Aufruf erstellt (Kernaussage der Antwort + zitierte Regeln).
+"""
+import re
+
+from prompt_builder import count_tokens
+from rules_document import find_references
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+MAX_QUESTION_CHARS = 200
+MAX_ANSWER_CHARS = 300
+
+
+def _shorten(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def summarize_turn(question, answer):
+    """Fasst eine Runde in einer Zeile zusammen"""
+    sentences = [s for s in SENTENCE_PATTERN.split(answer.strip()) if s]
+    # Antworten beginnen laut Richtlinien mit einem Kompliment, das ist kein Inhalt
+    if len(sentences) > 1 and sentences[0].endswith("!"):
+        sentences = sentences[1:]
+    core = _shorten(" ".join(sentences[:2]), MAX_ANSWER_CHARS)
+
+    line = f"- Frage: {_shorten(question, MAX_QUESTION_CHARS)} → Antwort: {core}"
+    references = find_references(answer)
+    if references:
+        line += f" (CR {', '.join(references[:5])})"
+    return line
+
+
+def compact_history(messages, summary, keep_turns, max_summary_tokens):
+    """Verdichtet den Verlauf.
+
+    Gibt (verbleibende Nachrichten, neue Zusammenfassung, archivierte Nachrichten)
+    zurück. Archivierte Nachrichten werden nur noch zur Anzeige aufbewahrt.
+    """
+    # Runden-Anfänge = Positionen der Benutzernachrichten
+    starts = [i for i, m in enumerate(messages) if m["role"] == "user"]
+    if len(starts) <= keep_turns:
+        return messages, summary, []
+
+    cut = starts[-keep_turns] if keep_turns else len(messages)
+    archived = messages[:cut]
+    remaining = messages[cut:]
+
+    lines = summary.split("\n") if summary else []
+    question = None
+    for message in archived:
+        if message["role"] == "user":
+            question = message["content"]
+        elif question is not None:
+            lines.append(summarize_turn(question, message["content"]))
+            question = None
+
+    # Älteste Zeilen fallen weg, wenn die Zusammenfassung zu groß wird
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_summary_tokens:
+        lines.pop(0)
+
+    return remaining, "\n".join(lines), archived
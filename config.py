@@ -1,23 +1,10 @@
 import streamlit as st
 import os
+from settings import Settings
+from telemetry import start_metrics_server
 
-class AppConfig:
-    """Zentrale Konfigurationsklasse für die App"""
-    
-    # App-Metadaten
-    PAGE_TITLE = "Monster Magic Mastermind"
-    PAGE_ICON = "🧙‍♂️"
-    LAYOUT = "wide"
-    
-    # API-Konfiguration
-    API_BASE_URL = "https://api.deepseek.com"
-    MODEL_NAME = "deepseek-chat"
-    
-    # Scryfall API
-    SCRYFALL_BASE_URL = "https://api.scryfall.com"
-    
-    # Cache-Einstellungen
-    CACHE_TTL = 3600  # 1 Stunde
+class AppConfig(Settings):
+    """Zentrale Konfigurationsklasse für die App (Streamlit-Teil)"""
     
     @staticmethod
     def setup_page():
@@ -28,30 +15,43 @@ class AppConfig:
             layout=AppConfig.LAYOUT
         )
     
+    @staticmethod
+    @st.cache_resource
+    def start_metrics_server():
+        """Startet den /metrics-Endpunkt einmal pro Prozess"""
+        if not AppConfig.METRICS_ENABLED:
+            return None
+        return start_metrics_server(AppConfig.METRICS_HOST, AppConfig.METRICS_PORT)
+    
     @staticmethod
     def get_api_key():
         """Holt den API-Key aus Secrets oder Umgebungsvariablen"""
         if "DEEPSEEK_API_KEY" in st.secrets:
             return st.secrets["DEEPSEEK_API_KEY"]
-        return os.getenv("DEEPSEEK_API_KEY")
+        return Settings.get_api_key()
     
     @staticmethod
     def initialize_session_state():
         """Initialisiert alle Session State Variablen"""
         
-        # Regeln laden
-        if "rules_lines" not in st.session_state:
-            try:
-                with open("rules.txt", "r", encoding="utf-8") as f:
-                    st.session_state.rules_lines = f.readlines()
-            except FileNotFoundError:
-                st.session_state.rules_lines = []
+        # Regeln werden prozessweit in MTGLogic geparst, hier nur prüfen
+        if "rules_available" not in st.session_state:
+            st.session_state.rules_available = os.path.exists(AppConfig.RULES_FILE)
+            if not st.session_state.rules_available:
                 st.warning("⚠️ rules.txt nicht gefunden. Regelsuche ist eingeschränkt.")
         
-        # Karten-Liste
+        # Karten-Auswahl: Name -> CardRecord (in Reihenfolge des Hinzufügens)
         if 'my_cards' not in st.session_state:
-            st.session_state.my_cards = []
+            st.session_state.my_cards = {}
+        
+        # Spezialregeln der Auswahl, bei jeder Änderung neu berechnet (None: berechnet der Judge)
+        if 'special_cases' not in st.session_state:
+            st.session_state.special_cases = None
         
         # Chat-Verlauf
         if 'messages' not in st.session_state:
             st.session_state.messages = []
+        
+        if 'history_summary' not in st.session_state:
+            st.session_state.history_summary = ""
+            st.session_state.archived_messages = []
@@ -0,0 +1,66 @@
+r"""Import eingefügter Decklisten und Board States.
+
+Unterstützt werden die Exporte von Arena, MTGO, Moxfield und Archidekt sowie
+einfache Listen. Die Beispiele lassen sich mit `python -m doctest decklist.py`
+prüfen.
+
+Arena (Abschnitte, Set-Code und Sammlernummer):
+
+>>> parse_decklist("Deck\n4 Lightning Bolt (M10) 146\n\nSideboard\n2 Blood Moon (9ED) 176")
+['Lightning Bolt', 'Blood Moon']
+
+MTGO (Sideboard mit "SB:"), doppelte Karten nur einmal:
+
+>>> parse_decklist("4 Lightning Bolt\n20 Mountain\nSB: 2 Blood Moon\nSB: 1 Lightning Bolt")
+['Lightning Bolt', 'Mountain', 'Blood Moon']
+
+Moxfield (Deckname unter "About", Foil-Markierung):
+
+>>> parse_decklist("About\nName Burn\n\nDeck\n4 Lightning Bolt (2X2) 117 *F*\n1 Urza's Saga (MH2) 259")
+['Lightning Bolt', "Urza's Saga"]
+
+Archidekt ("4x", Tags), eckige Set-Codes, Kommentare und Namen ohne Anzahl:
+
+>>> parse_decklist("// Board\n4x Lightning Bolt [M10] #Burn\nHumility\nDelver of Secrets // Insectile Aberration")
+['Lightning Bolt', 'Humility', 'Delver of Secrets // Insectile Aberration']
+"""
+import re
+
+# Abschnittsüberschriften gängiger Exportformate (Arena, MTGO, Moxfield, ...)
+SECTION_HEADERS = {
+    "deck", "main", "maindeck", "mainboard", "sideboard", "commander",
+    "companion", "maybeboard", "considering", "tokens", "about",
+}
+
+# "4 Name", "4x Name", "SB: 2 Name"
+QUANTITY_PATTERN = re.compile(r"^(?:SB:\s*)?(?:(\d+)\s*x?\s+)?(.+)$", re.IGNORECASE)
+# Set-Code und Sammlernummer "(M10) 146", "[M10]", Foil-Markierung "*F*", Tags "#..."
+SUFFIX_PATTERN = re.compile(r"\s+(?:\([A-Z0-9]{2,6}\)(?:\s+\S+)?|\[[A-Z0-9]{2,6}\]|\*[A-Z]+\*|#.*)$", re.IGNORECASE)
+
+
+def parse_decklist(text):
+    """Liest Kartennamen aus einer eingefügten Deckliste (ohne Duplikate, in Reihenfolge)"""
+    names = []
+    section = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", "//")):
+            continue
+        if line.rstrip(":").lower() in SECTION_HEADERS:
+            section = line.rstrip(":").lower()
+            continue
+        # Moxfield: "About" gefolgt von "Name <Deckname>"
+        if section == "about" and line.lower().startswith("name "):
+            continue
+
+        match = QUANTITY_PATTERN.match(line)
+        name = match.group(2).strip()
+        while True:
+            stripped = SUFFIX_PATTERN.sub("", name)
+            if stripped == name:
+                break
+            name = stripped
+
+        if name and name not in names:
+            names.append(name)
+    return names
@@ -0,0 +1,201 @@
+"""Lokaler Bild-Cache für das Karten-Grid.
+
+Jedes Kartenbild wird einmal von Scryfall geladen, auf Grid-Größe verkleinert
+und als JPEG auf der Platte abgelegt. Der Dateiname enthält die Scryfall-ID
+und die Bildversion (Query-Parameter der Bild-URL), ein neuer Scan ergibt
+also automatisch eine neue Datei. Wird das Größenlimit überschritten, fallen
+die am längsten nicht benutzten Dateien weg (Änderungszeit = letzte Nutzung).
+
+Bilder kommen vom CDN (cards.scryfall.io), nicht von der API: Downloads
+laufen über eine eigene Session und einen eigenen Thread-Pool, ohne das
+Ratenlimit des Scryfall-Clients. Beim Hinzufügen werden sie vorab geladen;
+das Grid liest nur, was schon da ist, und zeigt sonst die Original-URL.
+"""
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+from card_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+SAFE_NAME_PATTERN = re.compile(r"[^0-9A-Za-z_-]+")
+
+
+def image_url(card, size="normal"):
+    """Bild-URL einer Karte (bei doppelseitigen Karten die Vorderseite)"""
+    if "image_uris" in card:
+        return card["image_uris"].get(size)
+    faces = card.get("card_faces") or []
+    if faces and "image_uris" in faces[0]:
+        return faces[0]["image_uris"].get(size)
+    return None
+
+
+def image_version(url):
+    """Versionskennung einer Scryfall-Bild-URL ("...jpg?1562899616")"""
+    return urlparse(url).query or "0"
+
+
+class ImageCache:
+    """Verkleinerte Kartenbilder auf der Platte (LRU nach Größe) plus kleiner LRU im Speicher"""
+
+    # Beim Aufräumen bis auf diesen Anteil des Limits löschen
+    EVICT_TARGET = 0.9
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024, width=300, memory_entries=256,
+                 quality=85, workers=8, timeout=15, user_agent="MonsterMagicMastermind/1.0"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.width = width
+        self.quality = quality
+        self.timeout = timeout
+        self.memory = LRUCache(memory_entries)
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "downloads": 0, "errors": 0}
+
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._pending = set()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": user_agent})
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._files())
+
+    def _files(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    def path_for(self, card_id, url):
+        name = SAFE_NAME_PATTERN.sub("_", f"{card_id}-{image_version(url)}-{self.width}")
+        return os.path.join(self.directory, f"{name}.jpg")
+
+    def cached(self, card_id, url):
+        """JPEG-Bytes des Vorschaubilds aus Speicher oder Platte, None ohne Download"""
+        path = self.path_for(card_id, url)
+        data = self.memory.get(path)
+        if data is not None:
+            self.stats["memory_hits"] += 1
+            return data
+        data = self._read(path)
+        if data is not None:
+            self.memory.set(path, data, float("inf"))
+        return data
+
+    def prefetch(self, items):
+        """Lädt fehlende Vorschaubilder im Hintergrund, parallel (items: (Karten-ID, URL))"""
+        for card_id, url in items:
+            path = self.path_for(card_id, url)
+            with self._lock:
+                if path in self._pending or self.memory.get(path) is not None:
+                    continue
+                self._pending.add(path)
+            self.executor.submit(self._prefetch, card_id, url, path)
+
+    def _prefetch(self, card_id, url, path):
+        try:
+            self.get(card_id, url)
+        finally:
+            with self._lock:
+                self._pending.discard(path)
+
+    def get(self, card_id, url):
+        """JPEG-Bytes des Vorschaubilds, lädt es notfalls (None, wenn das nicht klappt)"""
+        path = self.path_for(card_id, url)
+        data = self.memory.get(path)
+        if data is not None:
+            self.stats["memory_hits"] += 1
+            return data
+
+        # Gleichzeitige Anfragen für dasselbe Bild laden es nur einmal
+        with self._lock:
+            key_lock = self._key_locks.setdefault(path, threading.Lock())
+        with key_lock:
+            try:
+                data = self._read(path)
+                if data is None:
+                    data = self._download(url, path)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning("Kartenbild %s konnte nicht geladen werden: %s", url, e)
+                return None
+            finally:
+                with self._lock:
+                    self._key_locks.pop(path, None)
+
+        self.memory.set(path, data, float("inf"))
+        return data
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Änderungszeit dient als "zuletzt benutzt" für die Verdrängung
+        os.utime(path)
+        self.stats["disk_hits"] += 1
+        return data
+
+    def _download(self, url, path):
+        with self.session.get(url, timeout=self.timeout) as response:
+            response.raise_for_status()
+            original = response.content
+        self.stats["downloads"] += 1
+
+        image = Image.open(io.BytesIO(original))
+        image = image.convert("RGB")
+        image.thumbnail((self.width, self.width * 2), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=self.quality, optimize=True)
+        data = output.getvalue()
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total_bytes += len(data)
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+        return data
+
+    def evict(self):
+        """Löscht die am längsten nicht benutzten Bilder, bis das Limit wieder eingehalten ist"""
+        files = sorted(self._files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * self.EVICT_TARGET
+        removed = 0
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.memory.delete(path)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._total_bytes = total
+        logger.info("Bild-Cache aufgeräumt: %s Dateien entfernt, %s Bytes belegt", removed, total)
+        return removed
+
+    def size(self):
+        return self._total_bytes
@@ -0,0 +1,184 @@
+"""Judge als HTTP-API für Bots und die Streamlit-App.
+
+    python judge_api.py                       # API_HOST:API_PORT, API_WORKERS Prozesse
+    python judge_api.py --port 8080 --workers 8
+    uvicorn judge_api:app --workers 4
+
+Endpunkte:
+    POST /cards/resolve  {"names": [...]}                        -> {"cards", "not_found"}
+    POST /rules/context  {"question", "cards": [...]}            -> {"rules", "special_cases",
+                                                                     "references", "not_found"}
+    POST /answer         {"question", "cards", "history", "summary"}
+                         -> NDJSON: {"type": "delta", "text"} ... {"type": "done", ...}
+    GET  /cards/autocomplete?q=...                               -> {"data": [Namen]}
+    GET  /metrics, /healthz
+
+Die API ist zustandslos: Kartenauswahl und Verlauf schickt der Client mit.
+Ist Scryfall nicht erreichbar, antworten /cards/* und /rules/context mit
+502; /answer meldet den Fehler im Stream und beendet ihn regulär mit "done".
+Jeder Worker-Prozess lädt Regel-Artefakt (mmap, die Seiten teilt das
+Betriebssystem), Suchindex, Spezialregeln und Clients einmal beim Start;
+Karten- und Antwort-Cache liegen in SQLite und werden von allen Workern
+geteilt. /metrics zeigt die Zahlen des Workers, der die Anfrage bedient.
+LLM_MAX_CONCURRENCY gilt für die ganze API und wird durch API_WORKERS
+geteilt; wer uvicorn direkt startet, setzt API_WORKERS passend zu --workers.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+
+import anyio.to_thread
+import requests
+import urllib3
+import uvicorn
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from judge_core import JudgeCore
+from settings import Settings
+from telemetry import metrics, trace
+
+logger = logging.getLogger(__name__)
+
+# Fehler beim Zugriff auf Scryfall (alles andere ist ein Fehler im eigenen Code -> 500)
+UPSTREAM_ERRORS = (requests.RequestException, urllib3.exceptions.HTTPError, TimeoutError)
+
+
+async def read_json(request, required=()):
+    """JSON-Body einer Anfrage, 400 bei ungültigem Body oder fehlenden Feldern"""
+    try:
+        data = await request.json()
+    except ValueError:
+        raise HTTPException(400, "Ungültiges JSON") from None
+    if not isinstance(data, dict):
+        raise HTTPException(400, "JSON-Objekt erwartet")
+    missing = [field for field in required if field not in data]
+    if missing:
+        raise HTTPException(400, f"Fehlende Felder: {', '.join(missing)}")
+    for field in ("question", "summary"):
+        if not isinstance(data.get(field, ""), str):
+            raise HTTPException(400, f"{field} muss ein String sein")
+    for field in ("names", "cards"):
+        items = data.get(field, [])
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            raise HTTPException(400, f"{field} muss eine Liste von Kartennamen sein")
+    history = data.get("history", [])
+    if not isinstance(history, list) or not all(is_message(message) for message in history):
+        raise HTTPException(400, "history muss eine Liste von {role, content} sein")
+    return data
+
+
+def is_message(message):
+    """Chat-Nachricht mit String-Feldern role und content"""
+    return (
+        isinstance(message, dict)
+        and isinstance(message.get("role"), str)
+        and isinstance(message.get("content"), str)
+    )
+
+
+async def upstream(func, *args):
+    """Führt einen blockierenden Schritt aus, 502 wenn Scryfall nicht erreichbar ist"""
+    try:
+        return await run_in_threadpool(func, *args)
+    except UPSTREAM_ERRORS as e:
+        logger.warning("%s fehlgeschlagen: %s", func.__name__, e)
+        raise HTTPException(502, f"Karten konnten nicht geladen werden: {e}") from None
+
+
+async def autocomplete(request):
+    core = request.app.state.core
+    names = await upstream(core.autocomplete, request.query_params.get("q", ""))
+    return JSONResponse({"data": names})
+
+
+async def resolve_cards(request):
+    data = await read_json(request, ("names",))
+    core = request.app.state.core
+    with trace("api_resolve", cards=len(data["names"])):
+        cards, not_found = await upstream(core.resolve_cards, data["names"])
+    return JSONResponse({"cards": cards, "not_found": not_found})
+
+
+async def rules_context(request):
+    data = await read_json(request, ("question",))
+    core = request.app.state.core
+    cards = data.get("cards", [])
+    with trace("api_rules", cards=len(cards)):
+        result = await upstream(core.lookup_rules, data["question"], cards)
+    return JSONResponse(result)
+
+
+async def answer(request):
+    data = await read_json(request, ("question",))
+    core = request.app.state.core
+    cards = data.get("cards", [])
+    result = core.answer(data["question"], cards, data.get("history", []), data.get("summary", ""))
+
+    async def events():
+        with trace("api_answer", cards=len(cards)):
+            try:
+                async for chunk in iterate_in_threadpool(iter(result)):
+                    yield json.dumps({"type": "delta", "text": chunk}, ensure_ascii=False) + "\n"
+                yield json.dumps({"type": "done", **result.metadata()}, ensure_ascii=False) + "\n"
+            finally:
+                # Auch wenn der Client die Verbindung trennt: LLM-Anfrage sofort beenden
+                result.close()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+async def metrics_endpoint(request):
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+async def healthz(request):
+    return PlainTextResponse("ok\n")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Läuft in jedem Worker-Prozess, dort ist noch kein Logging eingerichtet
+    logging.basicConfig(level=logging.INFO)
+    # Jeder laufende Antwort-Stream belegt beim Lesen einen Thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = Settings.API_THREADS
+    core = JudgeCore(Settings, processes=Settings.API_WORKERS)
+    await run_in_threadpool(core.warm_up)
+    app.state.core = core
+    logger.info("Judge-Worker bereit (Regeln %s)", core.compiled_rules.version)
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/cards/autocomplete", autocomplete),
+        Route("/cards/resolve", resolve_cards, methods=["POST"]),
+        Route("/rules/context", rules_context, methods=["POST"]),
+        Route("/answer", answer, methods=["POST"]),
+        Route("/metrics", metrics_endpoint),
+        Route("/healthz", healthz),
+    ],
+    lifespan=lifespan,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default=Settings.API_HOST)
+    parser.add_argument("--port", type=int, default=Settings.API_PORT)
+    parser.add_argument("--workers", type=int, default=Settings.API_WORKERS)
+    args = parser.parse_args(argv)
+
+    # Die Worker-Prozesse lesen die Anzahl für ihren Anteil an LLM_MAX_CONCURRENCY
+    os.environ["API_WORKERS"] = str(args.workers)
+    # Import-String statt Objekt, damit uvicorn mehrere Worker-Prozesse starten kann
+    uvicorn.run("judge_api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""HTTP-Client für die Judge-API mit derselben Schnittstelle wie JudgeCore.
+
+Die Streamlit-App nutzt ihn, wenn JUDGE_API_URL gesetzt ist; Karten, Verlauf
+und Zusammenfassung bleiben in der Session und werden pro Anfrage mitgeschickt
+(Karten als Namen).
+"""
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from judge_core import Answer, card_name
+
+
+class JudgeClient:
+    """Zugang zur Judge-API (Connection-Pool, Antwort als NDJSON-Stream)"""
+
+    def __init__(self, base_url, timeout=90, pool_size=16):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path, payload, stream=False):
+        response = self.session.post(
+            self.base_url + path, json=payload, timeout=self.timeout, stream=stream
+        )
+        response.raise_for_status()
+        return response
+
+    def autocomplete(self, term):
+        """Kartennamen zu einem Suchbegriff"""
+        response = self.session.get(
+            self.base_url + "/cards/autocomplete", params={"q": term}, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()["data"]
+
+    def resolve_cards(self, card_names):
+        """Gibt (gefundene Karten in Eingabereihenfolge, nicht gefundene Namen) zurück"""
+        data = self._post("/cards/resolve", {"names": list(card_names)}).json()
+        return data["cards"], data["not_found"]
+
+    def lookup_rules(self, question, cards):
+        """Regelkontext und Spezialregeln einer Frage (ohne LLM)"""
+        payload = {"question": question, "cards": [card_name(card) for card in cards]}
+        return self._post("/rules/context", payload).json()
+
+    def answer(self, question, cards, history=(), summary="", special=None):
+        """Beantwortet eine Frage als Stream (Anfrage erst beim Lesen).
+
+        special wird ignoriert: die API merkt sich die Spezialregeln pro Kartenauswahl.
+        """
+        payload = {
+            "question": question,
+            "cards": [card_name(card) for card in cards],
+            "history": list(history),
+            "summary": summary,
+        }
+        answer = Answer()
+        answer._chunks = self._answer(answer, payload)
+        return answer
+
+    def _answer(self, answer, payload):
+        try:
+            response = self._post("/answer", payload, stream=True)
+        except requests.RequestException as e:
+            answer.error = e
+            yield f"\n\n❌ Judge-API nicht erreichbar: {str(e)}"
+            return
+
+        # Schließen der Verbindung bricht auch die LLM-Anfrage auf dem Server ab
+        answer._stream = response
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event["type"] == "delta":
+                    yield event["text"]
+                elif event["type"] == "done":
+                    answer.update(event)
+        except Exception as e:
+            # Nach close() scheitert das Lesen an der geschlossenen Verbindung
+            if answer.cancelled:
+                return
+            answer.error = e
+            yield f"\n\n❌ Verbindung zur Judge-API abgebrochen: {str(e)}"
+        finally:
+            response.close()
@@ -0,0 +1,538 @@
+"""Judge-Kern ohne Oberfläche: Karten auflösen, Regelkontext, Prompt, Antwort-Stream.
+
+Alle geteilten Ressourcen (Kartenbestand, Caches, Scryfall-Client, Regel-
+Artefakt, Suchindex, Spezialregeln, LLM-Client) hängen an einem JudgeCore
+und werden beim ersten Zugriff einmal pro Prozess erzeugt. Alles, was zu
+einer Anfrage gehört (Karten, Verlauf, Zusammenfassung), wird als Argument
+übergeben; den Sitzungszustand hält der Aufrufer (Streamlit-App, Judge-API,
+Bot). Karten sind CardRecords aus der Sitzung oder Kartennamen, nur Namen
+werden pro Anfrage aufgelöst.
+"""
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from answer_cache import AnswerCache, context_key
+from card_cache import CardCache
+from card_record import CardRecord
+from card_store import CardStore, normalize_name, slim_card
+from database import SYSTEM_GUIDELINES
+from llm_client import LLMBusyError, LLMService
+from prompt_builder import PromptBuilder
+from rules_artifact import load_compiled_rules
+from rules_retriever import RulesRetriever
+from scryfall_client import ScryfallClient
+from settings import Settings
+from special_cases import SpecialCaseEngine
+from telemetry import annotate, metrics, record_span, span
+
+logger = logging.getLogger(__name__)
+
+# Statischer Anfang des System-Prompts (Prefix-Caching beim Anbieter)
+HEADER = f"""Du bist Monster Magic Mastermind.
+
+{SYSTEM_GUIDELINES}
+
+VERLINKUNGS-PFLICHT:
+Nutze für JEDE genannte Karte aus der Link-Datenbank das Format: [Kartenname](URL)
+Verwende EXAKT die URLs, die dort stehen. Erfinde niemals eigene URLs!
+
+PRIORITÄT:
+1. SPEZIALREGELN (höchste Priorität)
+2. KARTEN-DETAILS
+3. REGELKONTEXT (steht direkt vor der aktuellen Frage)"""
+
+_MISSING = object()
+
+
+def card_name(card):
+    """Name zu einem CardRecord oder Kartennamen"""
+    return card if isinstance(card, str) else card.name
+
+
+def format_rulings(rulings):
+    """Rulings einer Karte als Text für den Prompt"""
+    if rulings is None:
+        return "Rulings konnten nicht geladen werden."
+    if rulings:
+        return "\n".join([f"- {comment}" for comment in rulings])
+    return "Keine offiziellen Rulings vorhanden."
+
+
+def build_prompt(question, cards, special, rulings_by_id, rules_context, history=(), summary="",
+                 token_budget=Settings.PROMPT_TOKEN_BUDGET):
+    """Baut System-Nachricht und Verlauf für die KI innerhalb des Token-Budgets.
+
+    cards sind CardRecords, history ist der bisherige Verlauf ohne die aktuelle Frage.
+    """
+    links = [f"- {card.name}: {card.scryfall_uri}" for card in cards if card.scryfall_uri]
+    card_links = "\n".join(links) if links else "Keine Karten ausgewählt."
+
+    # Karten-Informationen (Oracle Text + Rulings)
+    card_info = "\n\n".join(
+        f"CARD: {card.name}\n"
+        f"TEXT: {card.text or 'Kein Text verfügbar'}\n"
+        f"RULINGS: {rulings_by_id.get(card.id, '')}"
+        for card in cards
+    )
+
+    # Bei Platzmangel wird zuerst die Verlaufs-Zusammenfassung gekürzt, dann der
+    # Verlauf, dann Regelkontext, dann Karten
+    builder = PromptBuilder(token_budget)
+    builder.add_section("header", HEADER, priority=PromptBuilder.FIXED)
+    builder.add_section(
+        "card_links", card_links, priority=PromptBuilder.FIXED,
+        label="DEINE LINK-DATENBANK:\n"
+    )
+    builder.add_section(
+        "special_cases", special.text, priority=4,
+        label="1. SPEZIALREGELN (höchste Priorität):\n", truncatable=False
+    )
+    builder.add_section("cards", card_info, priority=3, label="2. KARTEN-DETAILS:\n")
+    builder.add_section(
+        "rules", rules_context, priority=2,
+        label="3. REGELKONTEXT für die aktuelle Frage:\n",
+        placement=PromptBuilder.CONTEXT
+    )
+    if summary:
+        builder.add_section(
+            "history_summary", summary, priority=0,
+            label="BISHERIGER GESPRÄCHSVERLAUF (Zusammenfassung):\n"
+        )
+    builder.set_history(list(history) + [{"role": "user", "content": question}], priority=1)
+
+    with span("prompt_assembly"):
+        return builder.build()
+
+
+def shared(factory):
+    """Ressource, die beim ersten Zugriff einmal pro JudgeCore erzeugt wird"""
+    name = factory.__name__
+
+    @functools.wraps(factory)
+    def get(self):
+        resource = self._resources.get(name, _MISSING)
+        if resource is _MISSING:
+            with self._lock:
+                resource = self._resources.get(name, _MISSING)
+                if resource is _MISSING:
+                    resource = self._resources[name] = factory(self)
+        return resource
+
+    return property(get)
+
+
+class Answer:
+    """Antwort als Text-Stream; Metadaten stehen nach dem Lesen bereit"""
+
+    def __init__(self):
+        self.cached = False
+        self.prompt_tokens = None
+        self.truncated = []
+        self.not_found = []
+        self.usage = None
+        self.error = None
+        self.cancelled = False
+        self._chunks = iter(())
+        self._stream = None
+
+    def __iter__(self):
+        return self._chunks
+
+    def close(self):
+        """Bricht die Antwort ab (auch aus einem anderen Thread)"""
+        self.cancelled = True
+        if self._stream is not None:
+            self._stream.close()
+
+    cancel = close
+
+    def metadata(self):
+        """Metadaten als JSON-taugliches Dict"""
+        return {
+            "cached": self.cached,
+            "prompt_tokens": self.prompt_tokens,
+            "truncated": list(self.truncated),
+            "not_found": list(self.not_found),
+            "usage": self.usage,
+            "error": str(self.error) if self.error is not None else None,
+        }
+
+    def update(self, metadata):
+        """Übernimmt Metadaten (z.B. aus der Antwort der Judge-API)"""
+        for key, value in metadata.items():
+            if key in ("cached", "prompt_tokens", "truncated", "not_found", "usage", "error"):
+                setattr(self, key, value)
+
+
+class JudgeCore:
+    """UI-unabhängiger Judge: geteilte Ressourcen plus die Schritte einer Antwort"""
+
+    def __init__(self, settings=Settings, processes=1):
+        self.settings = settings
+        # Prozesse, die sich LLM_MAX_CONCURRENCY teilen (Worker der Judge-API)
+        self.processes = processes
+        self._resources = {}
+        self._lock = threading.RLock()
+        # Regelkontext pro (Frage, Karten), ersetzt st.cache_data der App
+        self.rules_context = functools.lru_cache(settings.RULES_CONTEXT_CACHE_ENTRIES)(
+            self._rules_context
+        )
+
+    @shared
+    def card_cache(self):
+        """Gemeinsamer Cache für Kartendaten und Rulings (Prozess-LRU + SQLite)"""
+        cache = CardCache(
+            self.settings.CARD_CACHE_FILE,
+            memory_entries=self.settings.CARD_CACHE_MEMORY_ENTRIES,
+            disk_entries=self.settings.CARD_CACHE_DISK_ENTRIES,
+            ttl=self.settings.CARD_CACHE_TTL,
+            negative_ttl=self.settings.CARD_CACHE_NEGATIVE_TTL
+        )
+        metrics.register_collector(lambda: [
+            ("card_cache_lookups_total", "counter", {"result": result}, count)
+            for result, count in cache.stats.items()
+        ])
+        return cache
+
+    @shared
+    def scryfall(self):
+        """Scryfall-Client (Connection-Pool, Ratenlimit, Retries)"""
+        client = ScryfallClient(
+            self.settings.SCRYFALL_BASE_URL,
+            rate_limit=self.settings.SCRYFALL_RATE_LIMIT,
+            pool_size=self.settings.SCRYFALL_MAX_WORKERS,
+            timeout=self.settings.SCRYFALL_TIMEOUT,
+            max_retries=self.settings.SCRYFALL_MAX_RETRIES
+        )
+        metrics.register_collector(lambda: [
+            ("scryfall_http_requests_total", "counter", {}, client.request_count)
+        ])
+        return client
+
+    @shared
+    def executor(self):
+        """Thread-Pool für parallele Scryfall-Anfragen"""
+        return ThreadPoolExecutor(
+            max_workers=self.settings.SCRYFALL_MAX_WORKERS,
+            thread_name_prefix="scryfall"
+        )
+
+    @shared
+    def card_store(self):
+        """Lokaler Kartenbestand, wird im Hintergrund aktuell gehalten"""
+        store = CardStore.load(self.settings.SCRYFALL_BULK_FILE)
+        if store and self.settings.SCRYFALL_BULK_REFRESH_INTERVAL:
+            store.start_refresh(
+                self.scryfall,
+                self.settings.SCRYFALL_BULK_REFRESH_INTERVAL,
+                self.settings.SCRYFALL_BULK_TYPE
+            )
+        return store
+
+    @shared
+    def compiled_rules(self):
+        """Kompiliertes Regel-Artefakt (baut es bei Bedarf neu)"""
+        return load_compiled_rules(self.settings.RULES_FILE, self.settings.RULES_ARTIFACT_DIR)
+
+    @shared
+    def retriever(self):
+        """Hybride Regelsuche mit Verweisgraph"""
+        return RulesRetriever.hybrid(
+            self.compiled_rules,
+            vector_weight=self.settings.RULES_VECTOR_WEIGHT
+        )
+
+    @shared
+    def special_cases(self):
+        """Spezialregeln aus data/special_cases.json"""
+        return SpecialCaseEngine.load(self.settings.SPECIAL_CASES_FILE)
+
+    @shared
+    def llm(self):
+        """LLM-Client (ein Event-Loop, begrenzte Parallelität)"""
+        return LLMService(
+            api_key=self.settings.get_api_key(),
+            base_url=self.settings.API_BASE_URL,
+            model=self.settings.MODEL_NAME,
+            timeout=self.settings.LLM_TIMEOUT,
+            connect_timeout=self.settings.LLM_CONNECT_TIMEOUT,
+            max_retries=self.settings.LLM_MAX_RETRIES,
+            max_concurrency=max(1, self.settings.LLM_MAX_CONCURRENCY // self.processes),
+            queue_timeout=self.settings.LLM_QUEUE_TIMEOUT
+        )
+
+    @shared
+    def answer_cache(self):
+        """Antwort-Cache für wiederkehrende Fragen"""
+        cache = AnswerCache(
+            self.settings.ANSWER_CACHE_FILE,
+            ttl=self.settings.ANSWER_CACHE_TTL,
+            similarity=self.settings.ANSWER_CACHE_SIMILARITY,
+            max_rows=self.settings.ANSWER_CACHE_MAX_ROWS
+        )
+        metrics.register_collector(lambda: [
+            ("answer_cache_lookups_total", "counter", {"result": result}, count)
+            for result, count in cache.stats.items()
+        ])
+        return cache
+
+    def warm_up(self):
+        """Erzeugt alle Ressourcen sofort (z.B. beim Start eines API-Workers)"""
+        for name in ("card_cache", "scryfall", "executor", "card_store", "compiled_rules",
+                     "retriever", "special_cases", "llm", "answer_cache"):
+            getattr(self, name)
+
+    def autocomplete(self, term):
+        """Kartennamen zu einem Suchbegriff (lokaler Bestand, sonst Scryfall)"""
+        if len(term) < 3:
+            return []
+        if self.card_store:
+            return self.card_store.autocomplete(term, limit=self.settings.AUTOCOMPLETE_LIMIT)
+        return self.scryfall.autocomplete(term)
+
+    def resolve_cards(self, card_names):
+        """Löst viele Kartennamen auf einmal auf: lokaler Bestand, Cache, dann /cards/collection.
+
+        Gibt (gefundene Karten in Eingabereihenfolge, nicht gefundene Namen) zurück.
+        """
+        store = self.card_store
+        cache = self.card_cache
+        ttl = self.settings.CARD_CACHE_TTL
+        resolved = {}
+        missing = []
+
+        for name in card_names:
+            card = store.get_by_name(name)
+            metrics.inc("card_store_lookups_total", labels={"result": "miss" if card is None else "hit"})
+            if card is None:
+                hit, card = cache.get("card_name", normalize_name(name))
+                if hit and card is None:
+                    continue  # Bekannt als "nicht gefunden"
+            if card is None:
+                missing.append(name)
+            else:
+                resolved[name] = card
+
+        not_found = []
+        if missing:
+            with span("card_collection"):
+                found, _ = self.scryfall.collection([{"name": name} for name in missing])
+
+            # Scryfall liefert den vollen Namen, auch wenn nur eine Seite angefragt wurde
+            by_name = {}
+            for card in found:
+                card = slim_card(card)
+                names = [card["name"]] + [f["name"] for f in card.get("card_faces", [])]
+                for card_name in names:
+                    by_name.setdefault(normalize_name(card_name), card)
+                cache.set("card_id", card["id"], card, ttl=ttl)
+
+            for name in missing:
+                card = by_name.get(normalize_name(name))
+                cache.set("card_name", normalize_name(name), card, ttl=ttl)
+                if card is None:
+                    not_found.append(name)
+                else:
+                    resolved[name] = card
+
+        cards = [resolved[name] for name in card_names if name in resolved]
+        not_found += [name for name in card_names if name not in resolved and name not in not_found]
+        return cards, not_found
+
+    def card_records(self, cards):
+        """Kompakte Records der Karten (ohne Duplikate) plus nicht gefundene Namen.
+
+        cards sind CardRecords (werden übernommen) oder Kartennamen (werden aufgelöst).
+        """
+        records = {card.name: card for card in cards if not isinstance(card, str)}
+        names = list(dict.fromkeys(card for card in cards if isinstance(card, str)))
+        if not names:
+            return list(records.values()), []
+        found, not_found = self.resolve_cards(names)
+        for card in found:
+            records.setdefault(card["name"], CardRecord.from_card(card))
+        return list(records.values()), not_found
+
+    def rulings(self, card_id):
+        """Offizielle Oracle Rulings einer Karte als Text (über den gemeinsamen Cache)"""
+        client = self.scryfall
+        try:
+            rulings = self.card_cache.get_or_fetch(
+                "rulings",
+                card_id,
+                lambda: client.rulings(card_id),
+                ttl=self.settings.CACHE_TTL
+            )
+        except Exception as e:
+            return f"Fehler beim Laden der Rulings: {e}"
+        return format_rulings(rulings)
+
+    def rulings_for_cards(self, card_ids):
+        """Lädt die Rulings mehrerer Karten parallel, höchstens RULINGS_DEADLINE Sekunden lang"""
+        executor = self.executor
+        with span("rulings"):
+            futures = {
+                card_id: executor.submit(self.rulings, card_id)
+                for card_id in dict.fromkeys(card_ids)
+            }
+            done, pending = wait(futures.values(), timeout=self.settings.RULINGS_DEADLINE)
+        if pending:
+            metrics.inc("rulings_timeouts_total", len(pending))
+
+        # Nicht rechtzeitig fertige Anfragen laufen weiter und füllen den Cache
+        return {
+            card_id: future.result() if future in done
+            else "Rulings konnten nicht rechtzeitig geladen werden."
+            for card_id, future in futures.items()
+        }
+
+    def _rules_context(self, question, card_names, rule_refs=(), card_texts=()):
+        """Sucht relevante Regeln inkl. Oberregeln, Verweisen und Glossar (bis zum Token-Budget).
+
+        Schlüsselwörter aus Frage und Oracle-Texten (card_texts) kommen zuerst.
+        """
+        # Suchbegriffe aus Frage + Kartennamen
+        query = " ".join([question] + list(card_names))
+        relevant_rules = self.retriever.retrieve(
+            query,
+            rule_refs=rule_refs,
+            token_budget=self.settings.RULES_CONTEXT_TOKEN_BUDGET,
+            limit=self.settings.RULES_CONTEXT_LIMIT,
+            card_texts=card_texts
+        )
+
+        if relevant_rules:
+            return "\n".join(relevant_rules)
+        return "Keine passenden Regeln gefunden."
+
+    def card_context(self, question, cards, special=None):
+        """Spezialregeln und Regelkontext einer Frage zu den gegebenen CardRecords.
+
+        special sind die vorberechneten Spezialregeln der Auswahl (z.B. aus der Session).
+        """
+        if special is None:
+            special = self.special_cases.for_selection(cards)
+        with span("rules_context"):
+            rules_context = self.rules_context(
+                question,
+                tuple(card.name for card in cards),
+                special.references,
+                tuple(card.text for card in cards)
+            )
+        return special, rules_context
+
+    def lookup_rules(self, question, cards):
+        """Regelkontext und Spezialregeln einer Frage (ohne LLM)"""
+        cards, not_found = self.card_records(cards)
+        special, rules_context = self.card_context(question, cards)
+        return {
+            "rules": rules_context,
+            "special_cases": special.text,
+            "references": list(special.references),
+            "not_found": not_found,
+        }
+
+    def prompt(self, question, cards, history=(), summary="", special=None):
+        """Prompt für eine Frage zu den gegebenen CardRecords"""
+        rulings_by_id = self.rulings_for_cards([card.id for card in cards])
+        special, rules_context = self.card_context(question, cards, special)
+        return build_prompt(
+            question, cards, special, rulings_by_id, rules_context, history, summary,
+            token_budget=self.settings.PROMPT_TOKEN_BUDGET
+        )
+
+    def answer_context(self, cards):
+        """Cache-Kontext einer Frage: Kartenauswahl, Regelversion, Modell"""
+        return context_key(
+            [card_name(card) for card in cards], self.compiled_rules.version, self.settings.MODEL_NAME
+        )
+
+    def answer(self, question, cards, history=(), summary="", special=None):
+        """Beantwortet eine Frage als Stream (Prompt und LLM-Anfrage erst beim Lesen)"""
+        answer = Answer()
+        answer._chunks = self._answer(answer, question, list(cards), list(history), summary, special)
+        return answer
+
+    def _answer(self, answer, question, cards, history, summary, special):
+        # Erste Frage ohne Vorgeschichte: wiederkehrende Fragen aus dem Cache beantworten
+        use_cache = self.settings.ANSWER_CACHE_ENABLED and not history and not summary
+        try:
+            if use_cache:
+                answer_context = self.answer_context(cards)
+                with span("answer_cache"):
+                    cached = self.answer_cache.get(question, answer_context)
+                annotate(answer_cache_hit=cached is not None)
+            else:
+                cached = None
+
+            if cached is None:
+                with span("build_prompt"):
+                    try:
+                        records, answer.not_found = self.card_records(cards)
+                    except Exception as e:
+                        # Z.B. Scryfall nicht erreichbar: als Antwort melden statt den Stream abzubrechen
+                        logger.warning("Karten konnten nicht aufgelöst werden: %s", e)
+                        answer.error = e
+                        answer.not_found = [card for card in cards if isinstance(card, str)]
+                    else:
+                        prompt = self.prompt(question, records, history, summary, special)
+        except Exception as e:
+            # Fehler beim Vorbereiten ebenfalls als Antwort melden, der Stream endet regulär
+            logger.exception("Anfrage konnte nicht vorbereitet werden")
+            answer.error = e
+            yield f"\n\n❌ Fehler beim Vorbereiten der Anfrage: {str(e)}"
+            return
+
+        if cached is not None:
+            answer.cached = True
+            yield cached
+            return
+        if answer.error is not None:
+            yield f"\n\n❌ Karten konnten nicht geladen werden: {str(answer.error)}"
+            return
+
+        answer.prompt_tokens = prompt.tokens
+        answer.truncated = prompt.truncated
+        annotate(prompt_estimate=prompt.tokens, truncated=prompt.truncated)
+        if answer.cancelled:
+            return
+
+        # Mit include_usage liefert der letzte Chunk die Token-Zahlen
+        stream = self.llm.stream(prompt.messages, stream_options={"include_usage": True})
+        answer._stream = stream
+        started = time.perf_counter()
+        first_token = None
+        parts = []
+
+        try:
+            for chunk in stream:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                    record_span("llm_first_token", first_token - started)
+                parts.append(chunk)
+                yield chunk
+        except LLMBusyError as e:
+            answer.error = e
+            yield "\n\n⏳ Der Mastermind ist gerade ausgelastet. Bitte versuche es gleich noch einmal."
+        except Exception as e:
+            answer.error = e
+            yield f"\n\n❌ Fehler bei der KI-Anfrage: {str(e)}"
+        finally:
+            # Greift auch, wenn der Leser den Stream vorzeitig verlässt
+            stream.close()
+            record_span("llm_stream", time.perf_counter() - started)
+            if stream.usage is not None:
+                answer.usage = {
+                    "prompt_tokens": stream.usage.prompt_tokens,
+                    "completion_tokens": stream.usage.completion_tokens,
+                }
+                annotate(**answer.usage)
+                metrics.inc("llm_tokens_total", stream.usage.prompt_tokens, {"kind": "prompt"})
+                metrics.inc("llm_tokens_total", stream.usage.completion_tokens, {"kind": "completion"})
+
+        # Abgebrochene Antworten sind unvollständig und werden nicht gespeichert
+        if use_cache and answer.error is None and not answer.cancelled and parts:
+            self.answer_cache.set(question, answer_context, "".join(parts))
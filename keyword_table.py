@@ -0,0 +1,110 @@
+"""Schnellzugriff auf Schlüsselwörter (Keyword Abilities und Keyword Actions).
+
+Vorberechnete Tabelle: Begriff -> definierende Regel (701.x / 702.x) und
+Glossareintrag. Frage und Oracle-Texte werden in Wort-N-Gramme zerlegt, jedes
+N-Gramm ist ein einzelner Dictionary-Lookup. Deutsche Begriffe laufen über
+den QueryExpander (MTG_VOCABULARY).
+"""
+import re
+
+KEYWORD_SECTION_PATTERN = re.compile(r"^70[12]\.\d+$")
+KEYWORD_WORD_PATTERN = re.compile(r"[a-z]+(?:['’][a-z]+)?")
+REMINDER_TEXT_PATTERN = re.compile(r"\([^)]*\)")
+# Längere Überschriften sind Einleitungstexte, keine Schlüsselwörter
+MAX_TITLE_WORDS = 6
+# Allgemeine Verben, die in fast jedem Oracle-Text stehen
+COMMON_ACTIONS = frozenset({
+    "activate", "cast", "play", "create", "search", "reveal", "shuffle",
+    "discard", "destroy", "exchange", "double", "triple", "counter",
+})
+
+
+class KeywordEntry:
+    """Ein Schlüsselwort mit Regelabschnitt und Glossar-Schlüssel"""
+
+    __slots__ = ("term", "rule", "glossary")
+
+    def __init__(self, term, rule, glossary=None):
+        self.term = term
+        self.rule = rule
+        self.glossary = glossary
+
+    def __repr__(self):
+        return f"KeywordEntry({self.term!r}, {self.rule!r})"
+
+
+class KeywordTable:
+    """Begriff (klein geschrieben) -> KeywordEntry"""
+
+    def __init__(self, entries, expander=None):
+        self.entries = entries
+        self.expander = expander
+        self.max_words = max((len(term.split()) for term in entries), default=1)
+
+    @classmethod
+    def from_document(cls, document, expander=None):
+        entries = {}
+
+        def register(term, rule):
+            key = term.lower()
+            if key not in entries:
+                glossary = key if key in document.glossary else None
+                entries[key] = KeywordEntry(term, rule, glossary)
+
+        for number, rule in document.rules.items():
+            if not KEYWORD_SECTION_PATTERN.match(number) or not rule.children:
+                continue
+            if len(rule.text.split()) > MAX_TITLE_WORDS:
+                continue
+            register(rule.text, number)
+            # "Tap and Untap" -> zusätzlich "Tap" und "Untap"
+            if " and " in rule.text:
+                for part in rule.text.split(" and "):
+                    register(part, number)
+
+        # Glossarbegriffe, die auf einen Schlüsselwort-Abschnitt verweisen
+        for key, entry in document.glossary.items():
+            if key in entries:
+                continue
+            sections = [n for n in entry.references if KEYWORD_SECTION_PATTERN.match(n)]
+            if sections:
+                entries[key] = KeywordEntry(entry.term, sections[0], key)
+
+        return cls(entries, expander)
+
+    def _get(self, phrase, single):
+        entry = self.entries.get(phrase)
+        if entry is None and single:
+            # Einfache Beugungen wie "sacrificed", "exiles", "attached"
+            for suffix in ("s", "es", "d", "ed"):
+                if phrase.endswith(suffix):
+                    entry = self.entries.get(phrase[:-len(suffix)])
+                    if entry is not None:
+                        break
+        return entry
+
+    def lookup(self, text, skip=()):
+        """Alle Schlüsselwörter im Text in Reihenfolge des Auftretens (längster Treffer zuerst)"""
+        found = {}
+        if self.expander is not None:
+            for english in self.expander.terms(text):
+                entry = self.entries.get(english.lower())
+                if entry is not None:
+                    found.setdefault(entry.rule, entry)
+
+        words = KEYWORD_WORD_PATTERN.findall(text.lower())
+        i = 0
+        while i < len(words):
+            for n in range(min(self.max_words, len(words) - i), 0, -1):
+                entry = self._get(" ".join(words[i:i + n]), n == 1)
+                if entry is not None and entry.term.lower() not in skip:
+                    found.setdefault(entry.rule, entry)
+                    i += n
+                    break
+            else:
+                i += 1
+        return list(found.values())
+
+    def lookup_oracle_text(self, text):
+        """Schlüsselwörter eines Oracle-Texts (ohne Erinnerungstext und allgemeine Verben)"""
+        return self.lookup(REMINDER_TEXT_PATTERN.sub("", text), skip=COMMON_ACTIONS)
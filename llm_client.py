@@ -0,0 +1,130 @@
+"""Prozessweiter, asynchroner LLM-Client.
+
+Ein einziger AsyncOpenAI-Client (mit Connection-Pool) läuft auf einem
+eigenen Event-Loop-Thread. Streams werden vom Aufrufer Stück für Stück
+abgeholt: liest niemand weiter, liest auch der Client nicht weiter
+(Backpressure), und ein abgebrochener Stream schließt die Verbindung sofort.
+Ein Semaphor begrenzt die gleichzeitigen Anfragen; weitere warten in der
+Warteschlange, bis ein Platz frei wird oder queue_timeout abläuft.
+"""
+import asyncio
+import threading
+
+from openai import AsyncOpenAI, Timeout
+
+
+class LLMBusyError(Exception):
+    """Alle Plätze belegt und die Wartezeit in der Warteschlange ist abgelaufen"""
+
+
+class LLMStream:
+    """Abbrechbarer Antwort-Stream; liefert Text-Stücke als normaler Iterator"""
+
+    def __init__(self, service, messages, options):
+        self._service = service
+        self._messages = messages
+        self._options = options
+        self._stream = None
+        self._acquired = False
+        self._closed = False
+        self.usage = None
+
+    def __iter__(self):
+        loop = self._service.loop
+        try:
+            asyncio.run_coroutine_threadsafe(self._open(), loop).result()
+            while not self._closed:
+                future = asyncio.run_coroutine_threadsafe(self._next(), loop)
+                try:
+                    chunk = future.result(timeout=self._service.read_timeout)
+                except StopAsyncIteration:
+                    break
+                except BaseException:
+                    future.cancel()
+                    raise
+
+                if getattr(chunk, "usage", None):
+                    self.usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Auch bei Abbruch durch den Aufrufer (GeneratorExit) Verbindung schließen
+            self.close()
+
+    async def _open(self):
+        try:
+            await asyncio.wait_for(
+                self._service.semaphore.acquire(), timeout=self._service.queue_timeout
+            )
+        except asyncio.TimeoutError:
+            raise LLMBusyError("Zu viele gleichzeitige Anfragen") from None
+        self._acquired = True
+
+        if self._closed:
+            self._acquired = False
+            self._service.semaphore.release()
+            return
+
+        stream = await self._service.client.chat.completions.create(
+            model=self._service.model,
+            messages=self._messages,
+            stream=True,
+            **self._options
+        )
+        if self._closed:
+            # Während des Verbindungsaufbaus abgebrochen, Platz ist bereits frei
+            await stream.close()
+            return
+        self._stream = stream
+
+    async def _next(self):
+        if self._stream is None:
+            raise StopAsyncIteration
+        return await self._stream.__anext__()
+
+    async def _close(self):
+        try:
+            if self._stream is not None:
+                await self._stream.close()
+        finally:
+            if self._acquired:
+                self._acquired = False
+                self._service.semaphore.release()
+
+    def close(self):
+        """Bricht den Stream ab und gibt den Platz im Semaphor frei"""
+        if self._closed:
+            return
+        self._closed = True
+        asyncio.run_coroutine_threadsafe(self._close(), self._service.loop)
+
+    cancel = close
+
+
+class LLMService:
+    """Gemeinsamer LLM-Zugang für alle Sessions eines Prozesses"""
+
+    def __init__(self, api_key, base_url, model, timeout=60, connect_timeout=10,
+                 max_retries=2, max_concurrency=16, queue_timeout=30):
+        self.model = model
+        self.read_timeout = timeout
+        self.queue_timeout = queue_timeout
+
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="llm-loop", daemon=True).start()
+
+        async def setup():
+            # Client (inkl. Connection-Pool) und Semaphor gehören zum Event-Loop des Services
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=Timeout(timeout, connect=connect_timeout),
+                max_retries=max_retries,
+            )
+            return client, asyncio.Semaphore(max_concurrency)
+
+        self.client, self.semaphore = asyncio.run_coroutine_threadsafe(setup(), self.loop).result()
+
+    def stream(self, messages, **options):
+        """Startet eine Chat-Completion als Stream (erst beim Iterieren)"""
+        return LLMStream(self, messages, options)
@@ -0,0 +1,337 @@
+"""Lasttest: viele simulierte Sessions gegen lokale Scryfall- und LLM-Stubs.
+
+Jede Session sucht ihre Karten (Autocomplete beim Tippen), fügt sie hinzu und
+stellt dann Fragen mit wachsendem Verlauf, wie ein Nutzer der App. Karten und
+Fragen stammen aus benchmarks/questions.json. Gemessen werden Durchsatz,
+Latenz-Perzentile je Schritt, Fehler und Speicher pro Session.
+
+    python loadtest.py                                  # Kern im eigenen Prozess
+    python loadtest.py --concurrency 10 50 100 --sessions 200
+    python loadtest.py --target http://127.0.0.1:8000   # laufende Judge-API
+    python loadtest.py --json load.json
+
+Die Stubs laufen in einem eigenen Prozess (stub_servers.py), damit sie weder
+die Messung noch den Speicher des Treibers verfälschen. Für --target muss die
+Judge-API mit SCRYFALL_BASE_URL/API_BASE_URL auf die Stubs zeigen (und mit
+eigenem CACHE_DIR laufen, siehe stub_servers.py); den Speicher der
+API-Worker misst dieser Treiber nicht.
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark import QUESTIONS_FILE, percentile
+from card_record import CardRecord
+from chat_history import compact_history
+from judge_client import JudgeClient
+from judge_core import JudgeCore
+from settings import Settings
+from stub_servers import LLM_PORT, SCRYFALL_PORT, add_stub_arguments
+
+OPERATIONS = ("search", "add", "first_token", "answer", "session")
+FOLLOW_UPS = (
+    "Und was passiert, wenn mein Gegner darauf mit einem Instant antwortet?",
+    "Gilt das auch, wenn die Kreatur die Kontrolle wechselt?",
+    "Welche Regel ist dafür genau maßgeblich?",
+    "Ändert sich etwas, wenn die Karte als Kopie ins Spiel kommt?",
+)
+
+
+def load_settings(scryfall_url, llm_url, cache_dir, scryfall_rate, card_store):
+    """Einstellungen für den Kern: Stubs, frische Caches, optional ohne lokalen Bestand"""
+
+    class LoadTestSettings(Settings):
+        SCRYFALL_BASE_URL = scryfall_url
+        API_BASE_URL = llm_url
+        SCRYFALL_RATE_LIMIT = scryfall_rate
+        CARD_CACHE_FILE = os.path.join(cache_dir, "scryfall.sqlite")
+        ANSWER_CACHE_FILE = os.path.join(cache_dir, "answers.sqlite")
+        SCRYFALL_BULK_FILE = Settings.SCRYFALL_BULK_FILE if card_store else os.path.join(cache_dir, "none.json")
+        SCRYFALL_BULK_REFRESH_INTERVAL = None
+
+        @staticmethod
+        def get_api_key():
+            return "loadtest"
+
+    return LoadTestSettings
+
+
+class Recorder:
+    """Latenzen und Fehler je Schritt, von allen Session-Threads befüllt"""
+
+    def __init__(self):
+        self.latencies = {name: [] for name in OPERATIONS}
+        self.errors = {name: 0 for name in OPERATIONS}
+        self.state_sizes = []
+        self._lock = threading.Lock()
+
+    def add(self, operation, seconds):
+        with self._lock:
+            self.latencies[operation].append(seconds * 1000)
+
+    def error(self, operation):
+        with self._lock:
+            self.errors[operation] += 1
+
+    def state_size(self, size):
+        with self._lock:
+            self.state_sizes.append(size)
+
+    def timed(self, operation, function, *args):
+        started = time.perf_counter()
+        try:
+            result = function(*args)
+        except Exception:
+            self.error(operation)
+            return None
+        self.add(operation, time.perf_counter() - started)
+        return result
+
+
+def run_session(judge, case, questions, recorder, rng):
+    """Eine Session: Karten suchen und hinzufügen, dann Fragen mit Verlauf"""
+    started = time.perf_counter()
+    my_cards = {}
+    messages = []
+    summary = ""
+    archived = []
+
+    for name in case["cards"]:
+        # Autocomplete beim Tippen: ab 3 Zeichen einige Zwischenstände
+        for length in sorted({3, min(len(name), 5), min(len(name), 8)}):
+            recorder.timed("search", judge.autocomplete, name[:length])
+        result = recorder.timed("add", judge.resolve_cards, [name])
+        if result and result[0]:
+            card = result[0][0]
+            my_cards.setdefault(card["name"], CardRecord.from_card(card))
+
+    prompts = [case["question"]] + rng.sample(FOLLOW_UPS, min(questions - 1, len(FOLLOW_UPS)))
+    for prompt in prompts[:questions]:
+        history = list(messages)
+        messages.append({"role": "user", "content": prompt})
+        asked = time.perf_counter()
+        answer = judge.answer(prompt, list(my_cards.values()), history, summary)
+        parts = []
+        try:
+            for chunk in answer:
+                if not parts:
+                    recorder.add("first_token", time.perf_counter() - asked)
+                parts.append(chunk)
+        except Exception:
+            answer.error = answer.error or "stream"
+        if answer.error:
+            recorder.error("answer")
+        else:
+            recorder.add("answer", time.perf_counter() - asked)
+        messages.append({"role": "assistant", "content": "".join(parts)})
+
+        messages, summary, moved = compact_history(
+            messages, summary, Settings.HISTORY_KEEP_TURNS, Settings.HISTORY_SUMMARY_TOKENS
+        )
+        archived = (archived + moved)[-Settings.HISTORY_MAX_ARCHIVED:]
+
+    recorder.add("session", time.perf_counter() - started)
+    # Größe dessen, was die App pro Session im Session State hält
+    state = {"my_cards": my_cards, "messages": messages, "history_summary": summary,
+             "archived_messages": archived}
+    recorder.state_size(len(pickle.dumps(state)))
+
+
+def rss_kib():
+    """Aktueller Speicher des Prozesses (ohne /proc: Spitzenwert aus getrusage)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024 if sys.platform == "darwin" else rss
+
+
+class RSSSampler:
+    """Misst den höchsten Speicherstand während einer Stufe (alle 50 ms)"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = rss_kib()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_kib())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_kib())
+
+
+def run_level(judge, cases, sessions, concurrency, questions, seed):
+    """Alle Sessions einer Parallelitätsstufe, gibt die Kennzahlen zurück"""
+    recorder = Recorder()
+    rng = random.Random(seed)
+    plan = [(cases[i % len(cases)], random.Random(rng.random())) for i in range(sessions)]
+    rss_before = rss_kib()
+
+    sampler = RSSSampler()
+    started = time.perf_counter()
+    with sampler, ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="session") as executor:
+        futures = [
+            executor.submit(run_session, judge, case, questions, recorder, session_rng)
+            for case, session_rng in plan
+        ]
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                recorder.error("session")
+    duration = time.perf_counter() - started
+
+    result = {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "duration_s": duration,
+        "sessions_per_s": len(recorder.latencies["session"]) / duration,
+        "questions_per_s": len(recorder.latencies["answer"]) / duration,
+        "errors": dict(recorder.errors),
+        # Enthält auch Erstbelegungen (Caches, Thread-Stacks), daher eine Obergrenze
+        "rss_peak_growth_mib": (sampler.peak - rss_before) / 1024,
+        "rss_kib_per_session": max(0.0, sampler.peak - rss_before) / concurrency,
+        "state_kib_mean": sum(recorder.state_sizes) / max(1, len(recorder.state_sizes)) / 1024,
+    }
+    for operation, values in recorder.latencies.items():
+        if values:
+            result[operation] = {
+                "count": len(values),
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "p99_ms": percentile(values, 99),
+                "max_ms": max(values),
+            }
+    return result
+
+
+def print_level(result):
+    print(
+        f"\nParallelität {result['concurrency']}: {result['sessions']} Sessions in "
+        f"{result['duration_s']:.1f} s, {result['sessions_per_s']:.2f} Sessions/s, "
+        f"{result['questions_per_s']:.2f} Fragen/s"
+    )
+    print(f"{'schritt':<12}{'anzahl':>8}{'fehler':>8}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}{'max_ms':>10}")
+    for operation in OPERATIONS:
+        stats = result.get(operation)
+        errors = result["errors"][operation]
+        if stats is None:
+            print(f"{operation:<12}{0:>8}{errors:>8}")
+            continue
+        print(
+            f"{operation:<12}{stats['count']:>8}{errors:>8}{stats['p50_ms']:>10.1f}"
+            f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}"
+        )
+    print(
+        f"Speicher: RSS-Spitze +{result['rss_peak_growth_mib']:.1f} MiB, "
+        f"{result['rss_kib_per_session']:.1f} KiB pro gleichzeitiger Session, "
+        f"Session State Ø {result['state_kib_mean']:.1f} KiB"
+    )
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Stub auf Port {port} nicht erreichbar")
+
+
+def start_stub_process(args):
+    """Startet stub_servers.py als eigenen Prozess und wartet auf beide Ports"""
+    process = subprocess.Popen(
+        [sys.executable, "stub_servers.py",
+         "--scryfall-port", str(args.scryfall_port), "--llm-port", str(args.llm_port),
+         "--scryfall-latency", str(args.scryfall_latency), "--llm-ttft", str(args.llm_ttft),
+         "--llm-tokens", str(args.llm_tokens), "--llm-interval", str(args.llm_interval)],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(args.scryfall_port)
+        wait_for_port(args.llm_port)
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sessions", type=int, default=100, help="Sessions pro Stufe")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50],
+                        help="Gleichzeitige Sessions (mehrere Stufen möglich)")
+    parser.add_argument("--questions", type=int, default=2, help="Fragen pro Session")
+    parser.add_argument("--target", help="URL einer laufenden Judge-API statt Kern im Prozess")
+    parser.add_argument("--scryfall-port", type=int, default=SCRYFALL_PORT)
+    parser.add_argument("--llm-port", type=int, default=LLM_PORT)
+    parser.add_argument("--scryfall-rate", type=float, default=Settings.SCRYFALL_RATE_LIMIT,
+                        help="Ratenlimit des Scryfall-Clients (Anfragen/s)")
+    parser.add_argument("--card-store", action="store_true",
+                        help="Lokalen Kartenbestand nutzen statt Scryfall-Stub")
+    parser.add_argument("--no-stubs", action="store_true", help="Stubs laufen bereits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Ergebnis als JSON speichern")
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with open(QUESTIONS_FILE, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+
+    def create_judge():
+        if args.target:
+            return JudgeClient(args.target, pool_size=max(args.concurrency))
+        # Jede Stufe mit frischem Kern und leeren Caches, damit Stufen vergleichbar sind
+        settings = load_settings(
+            f"http://127.0.0.1:{args.scryfall_port}", f"http://127.0.0.1:{args.llm_port}",
+            tempfile.mkdtemp(prefix="mtg-loadtest-"), args.scryfall_rate, args.card_store
+        )
+        judge = JudgeCore(settings)
+        judge.warm_up()
+        return judge
+
+    stubs = None if args.no_stubs else start_stub_process(args)
+    try:
+        print(f"Ziel: {args.target or 'Kern im Prozess'}, {args.questions} Fragen pro Session, "
+              f"LLM {args.llm_ttft:.0f} ms + {args.llm_tokens} x {args.llm_interval:.0f} ms")
+        results = []
+        for level, concurrency in enumerate(args.concurrency):
+            judge = create_judge()
+            result = run_level(judge, cases, args.sessions, concurrency, args.questions, args.seed + level)
+            print_level(result)
+            results.append(result)
+    finally:
+        if stubs is not None:
+            stubs.terminate()
+            stubs.wait()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
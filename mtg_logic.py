@@ -1,69 +1,87 @@
 import streamlit as st
-import requests
 from config import AppConfig
+from judge_client import JudgeClient
+from judge_core import JudgeCore
 
 class MTGLogic:
     """Enthält die MTG-spezifische Logik (Rulings, Regelsuche, etc.)"""
     
     @staticmethod
-    @st.cache_data(ttl=AppConfig.CACHE_TTL)
+    @st.cache_resource
+    def get_core():
+        """Judge-Kern dieses Prozesses; Ressourcen entstehen erst beim ersten Zugriff"""
+        return JudgeCore(AppConfig)
+    
+    @staticmethod
+    @st.cache_resource
+    def get_judge():
+        """Judge für Fragen: die Judge-API (JUDGE_API_URL) oder der Kern im eigenen Prozess"""
+        if AppConfig.JUDGE_API_URL:
+            return JudgeClient(AppConfig.JUDGE_API_URL, timeout=AppConfig.API_TIMEOUT)
+        return MTGLogic.get_core()
+    
+    @staticmethod
+    def get_card_cache():
+        """Gemeinsamer Cache für Kartendaten und Rulings (Prozess-LRU + SQLite)"""
+        return MTGLogic.get_core().card_cache
+    
+    @staticmethod
+    def get_scryfall_client():
+        """Prozessweiter Scryfall-Client (Connection-Pool, Ratenlimit, Retries)"""
+        return MTGLogic.get_core().scryfall
+    
+    @staticmethod
     def get_scryfall_rulings(card_id):
-        """Holt die offiziellen Oracle Rulings von Scryfall"""
-        try:
-            url = f"{AppConfig.SCRYFALL_BASE_URL}/cards/{card_id}/rulings"
-            res = requests.get(url, timeout=5)
-            
-            if res.status_code == 200:
-                rulings = res.json().get("data", [])
-                
-                if rulings:
-                    return "\n".join([f"- {r['comment']}" for r in rulings])
-                else:
-                    return "Keine offiziellen Rulings vorhanden."
-            else:
-                return "Rulings konnten nicht geladen werden."
-                
-        except Exception as e:
-            return f"Fehler beim Laden der Rulings: {e}"
+        """Holt die offiziellen Oracle Rulings (über den gemeinsamen Cache)"""
+        return MTGLogic.get_core().rulings(card_id)
     
     @staticmethod
-    @st.cache_data
-    def get_rules_context(question, card_names, _rules_lines):
-        """Sucht relevante Passagen aus der rules.txt"""
-        
-        # Suchbegriffe aus Frage + Kartennamen
-        search_terms = question.split() + list(card_names)
-        
-        # Nur Begriffe mit mehr als 3 Zeichen
-        search_terms = [term for term in search_terms if len(term) > 3]
-        
-        # Relevante Zeilen finden
-        found_lines = []
-        for line in _rules_lines:
-            line_lower = line.lower()
-            
-            # Prüfen ob irgendein Suchbegriff in der Zeile vorkommt
-            if any(term.lower() in line_lower for term in search_terms):
-                found_lines.append(line.strip())
-        
-        # Maximal 30 Zeilen zurückgeben
-        relevant_rules = found_lines[:30]
-        
-        if relevant_rules:
-            return "\n".join(relevant_rules)
-        else:
-            return "Keine passenden Regeln gefunden."
+    def get_rulings_for_cards(card_ids):
+        """Lädt die Rulings mehrerer Karten parallel, höchstens RULINGS_DEADLINE Sekunden lang"""
+        return MTGLogic.get_core().rulings_for_cards(card_ids)
+    
+    @staticmethod
+    def get_compiled_rules():
+        """Kompiliertes Regel-Artefakt (einmal pro Prozess geladen)"""
+        return MTGLogic.get_core().compiled_rules
+    
+    @staticmethod
+    def get_rules_document():
+        """Regelbaum und Glossar (von allen Sessions geteilt)"""
+        return MTGLogic.get_compiled_rules().document
+    
+    @staticmethod
+    def get_rules_index():
+        """Suchindex über das Regelwerk (von allen Sessions geteilt)"""
+        return MTGLogic.get_compiled_rules().index
+    
+    @staticmethod
+    def get_rules_retriever():
+        """Hybride Regelsuche mit Verweisgraph (von allen Sessions geteilt)"""
+        return MTGLogic.get_core().retriever
+    
+    @staticmethod
+    def get_special_case_engine():
+        """Spezialregeln aus data/special_cases.json (von allen Sessions geteilt)"""
+        return MTGLogic.get_core().special_cases
+    
+    @staticmethod
+    def get_rules_context(question, card_names, rule_refs=(), card_texts=()):
+        """Sucht relevante Regeln inkl. Oberregeln, Verweisen und Glossar (bis zum Token-Budget)"""
+        return MTGLogic.get_core().rules_context(
+            question, tuple(card_names), tuple(rule_refs), tuple(card_texts)
+        )
     
     @staticmethod
     def format_card_info(card):
-        """Formatiert Karteninformationen für die Anzeige"""
+        """Formatiert Karteninformationen (CardRecord) für die Anzeige"""
         info = {
-            "name": card.get("name", "Unbekannt"),
-            "type": card.get("type_line", ""),
-            "mana_cost": card.get("mana_cost", ""),
-            "oracle_text": card.get("oracle_text", ""),
-            "power": card.get("power", ""),
-            "toughness": card.get("toughness", ""),
+            "name": card.name or "Unbekannt",
+            "type": card.type_line or "",
+            "mana_cost": card.mana_cost or "",
+            "oracle_text": card.text or "",
+            "power": card.power or "",
+            "toughness": card.toughness or "",
         }
         return info
 
@@ -73,18 +91,15 @@ def get_scryfall_rulings(card_id):
     """Legacy-Funktion für Kompatibilität"""
     return MTGLogic.get_scryfall_rulings(card_id)
 
-def get_rules_context(question, card_names, rules_lines):
-    """Legacy-Funktion für Kompatibilität"""
-    return MTGLogic.get_rules_context(question, card_names, rules_lines)
+def get_rules_context(question, card_names, rules_lines=None):
+    """Legacy-Funktion für Kompatibilität (rules_lines wird nicht mehr benötigt)"""
+    return MTGLogic.get_rules_context(question, card_names)
 
 def search_scryfall(searchterm: str):
     """Wird von der Searchbox für die Autovervollständigung genutzt."""
     if len(searchterm) < 3: 
         return []
     try:
-        res = requests.get(f"https://api.scryfall.com/cards/autocomplete?q={searchterm}")
-        if res.status_code == 200:
-            return res.json().get("data", [])
+        return MTGLogic.get_scryfall_client().autocomplete(searchterm)
     except Exception:
         return []
-    return []
@@ -0,0 +1,179 @@
+"""Zusammenbau des Prompts innerhalb eines Token-Budgets.
+
+Abschnitte haben eine Priorität; wird das Budget überschritten, werden zuerst
+die Abschnitte mit der niedrigsten Priorität gekürzt (Verlauf: älteste
+Nachrichten zuerst, Textabschnitte: Zeilen vom Ende her).
+
+Aufbau für Prompt-Prefix-Caching beim Anbieter: Abschnitte mit placement
+PREFIX bilden die erste System-Nachricht (statisch zuerst), danach folgt der
+Verlauf. Abschnitte mit placement CONTEXT (z.B. der Regelkontext zur aktuellen
+Frage) stehen erst direkt vor der letzten Nachricht, damit alles davor über
+mehrere Anfragen hinweg unverändert bleibt.
+"""
+import logging
+import math
+import re
+
+try:
+    import tiktoken
+except ImportError:  # Optional, sonst wird geschätzt
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+TRUNCATION_MARKER = "[... gekürzt]"
+# Aufschlag pro Chat-Nachricht (Rolle, Trennzeichen)
+MESSAGE_OVERHEAD = 4
+
+_encoding = None
+
+
+def count_tokens(text):
+    """Zählt bzw. schätzt die Tokens eines Textes.
+
+    Mit installiertem tiktoken wird exakt gezählt, sonst grob wie ein
+    BPE-Tokenizer geschätzt: Satzzeichen einzeln, Wörter in Stücken à 4 Zeichen.
+    """
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text, disallowed_special=()))
+    return sum(math.ceil(len(piece) / 4) for piece in TOKEN_PIECE_PATTERN.findall(text))
+
+
+def truncate_lines(text, max_tokens):
+    """Kürzt einen Text zeilenweise von hinten auf höchstens max_tokens"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - count_tokens(TRUNCATION_MARKER)
+    kept = []
+    used = 0
+    for line in text.split("\n"):
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept + [TRUNCATION_MARKER])
+
+
+class PromptSection:
+    """Ein Abschnitt der System-Nachricht"""
+
+    __slots__ = ("name", "label", "text", "priority", "truncatable", "placement")
+
+    def __init__(self, name, text, priority, label=None, truncatable=True, placement="prefix"):
+        self.name = name
+        self.label = label
+        self.text = text
+        self.priority = priority
+        self.truncatable = truncatable
+        self.placement = placement
+
+    def render(self):
+        return f"{self.label}{self.text}" if self.label else self.text
+
+
+class Prompt:
+    """Ergebnis des PromptBuilders: Nachrichten für die API plus Token-Statistik"""
+
+    def __init__(self, messages, tokens, section_tokens, truncated):
+        self.messages = messages
+        self.tokens = tokens
+        self.section_tokens = section_tokens
+        self.truncated = truncated
+
+
+class PromptBuilder:
+    """Baut System-Nachricht und Verlauf so zusammen, dass das Token-Budget eingehalten wird"""
+
+    # Feste Abschnitte (Persona, Richtlinien) werden nie gekürzt
+    FIXED = 100
+    # Platzierung: vor dem Verlauf (cachebar) oder direkt vor der aktuellen Frage
+    PREFIX = "prefix"
+    CONTEXT = "context"
+
+    def __init__(self, token_budget):
+        self.token_budget = token_budget
+        self.sections = []
+        self.history = []
+        self.history_priority = 0
+
+    def add_section(self, name, text, priority, label=None, truncatable=True, placement=PREFIX):
+        self.sections.append(PromptSection(name, text, priority, label, truncatable, placement))
+        return self
+
+    def set_history(self, messages, priority=0):
+        """Chat-Verlauf; die letzte Nachricht (aktuelle Frage) bleibt immer erhalten"""
+        self.history = list(messages)
+        self.history_priority = priority
+        return self
+
+    def _history_tokens(self):
+        return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in self.history)
+
+    def _system_tokens(self):
+        return sum(
+            count_tokens(self._system_text(placement)) + MESSAGE_OVERHEAD
+            for placement in (self.PREFIX, self.CONTEXT)
+            if self._system_text(placement)
+        )
+
+    def _system_text(self, placement):
+        return "\n\n".join(
+            section.render() for section in self.sections if section.placement == placement
+        )
+
+    def _messages(self):
+        messages = [{"role": "system", "content": self._system_text(self.PREFIX)}]
+        messages += self.history[:-1]
+        context = self._system_text(self.CONTEXT)
+        if context:
+            messages.append({"role": "system", "content": context})
+        messages += self.history[-1:]
+        return messages
+
+    def build(self):
+        """Kürzt nach Priorität bis zum Budget und gibt einen Prompt zurück"""
+        truncated = []
+        overflow = self._system_tokens() + self._history_tokens() - self.token_budget
+
+        candidates = [s for s in self.sections if s.truncatable and s.priority < self.FIXED]
+        candidates.append(None)  # Platzhalter für den Verlauf
+        candidates.sort(key=lambda s: self.history_priority if s is None else s.priority)
+
+        for section in candidates:
+            if overflow <= 0:
+                break
+
+            if section is None:
+                # Älteste Nachrichten zuerst, die aktuelle Frage bleibt
+                while overflow > 0 and len(self.history) > 1:
+                    message = self.history.pop(0)
+                    overflow -= count_tokens(message["content"]) + MESSAGE_OVERHEAD
+                    if "history" not in truncated:
+                        truncated.append("history")
+                continue
+
+            tokens = count_tokens(section.text)
+            shortened = truncate_lines(section.text, max(0, tokens - overflow))
+            if shortened != section.text:
+                section.text = shortened
+                overflow -= tokens - count_tokens(shortened)
+                truncated.append(section.name)
+
+        section_tokens = {s.name: count_tokens(s.text) for s in self.sections}
+        section_tokens["history"] = self._history_tokens()
+
+        messages = self._messages()
+        tokens = self._system_tokens() + self._history_tokens()
+
+        logger.info(
+            "Prompt: %s Tokens (Budget %s), Abschnitte %s, gekürzt %s",
+            tokens, self.token_budget, section_tokens, truncated or "-"
+        )
+        return Prompt(messages, tokens, section_tokens, truncated)
@@ -0,0 +1,246 @@
+"""Kompiliertes, per mmap ladbares Regel-Artefakt.
+
+Build-Schritt (z.B. im Container-Build):
+    python rules_artifact.py [rules.txt] [zielverzeichnis]
+
+Aufbau der Datei:
+    MAGIC | Formatversion (u32) | Header-Länge (u32) | Header (JSON) | Sektionen
+
+Der Header enthält das "effective as of"-Datum, den SHA-256 der Quelldatei und
+Offset/Länge jeder Sektion. Zahlen-Sektionen (Postings, Vektormatrix) werden
+beim Laden nicht kopiert, sondern direkt auf der gemappten Datei genutzt.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+
+import numpy as np
+
+from rules_document import EFFECTIVE_DATE_PATTERN, GlossaryEntry, Rule, RulesDocument
+from rules_embeddings import EMBEDDING_DIM, RulesVectors
+from rules_index import RulesIndex
+
+MAGIC = b"MTGRULES"
+FORMAT_VERSION = 3
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 8
+
+
+class CompiledRules:
+    """Geladenes Regelwerk: Regelbaum, Glossar, Suchindex und Vektormatrix"""
+
+    def __init__(self, document, index, source_hash=None, path=None, vectors=None):
+        self.document = document
+        self.index = index
+        self.vectors = vectors
+        self.source_hash = source_hash
+        self.path = path
+
+    @property
+    def version(self):
+        """Regelversion (effective date) für Cache-Schlüssel"""
+        return self.document.effective_date or "unbekannt"
+
+
+def file_hash(path):
+    """SHA-256 einer Datei"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_effective_date(rules_file):
+    """Liest das "effective as of"-Datum aus dem Kopf der rules.txt"""
+    with open(rules_file, "r", encoding="utf-8") as f:
+        for _ in range(10):
+            match = EFFECTIVE_DATE_PATTERN.search(f.readline())
+            if match:
+                return match.group(1)
+    return None
+
+
+def artifact_path(rules_file, artifact_dir):
+    """Dateiname des Artefakts, abgeleitet aus dem effective date"""
+    effective_date = read_effective_date(rules_file) or "unknown"
+    slug = re.sub(r"[^0-9a-z]+", "-", effective_date.lower()).strip("-")
+    return os.path.join(artifact_dir, f"rules-{slug}.bin")
+
+
+def _encode_strings(strings):
+    blob = bytearray()
+    offsets = array("I", [0])
+    for value in strings:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets.tobytes() + bytes(blob)
+
+
+def _decode_strings(buffer, count):
+    offsets = buffer[:(count + 1) * 4].cast("I")
+    blob = buffer[(count + 1) * 4:]
+    return [str(blob[offsets[i]:offsets[i + 1]], "utf-8") for i in range(count)]
+
+
+def build_artifact(rules_file, path):
+    """Parst die rules.txt und schreibt das kompilierte Artefakt (atomar)"""
+    with open(rules_file, "r", encoding="utf-8") as f:
+        document = RulesDocument.parse(f)
+    index = RulesIndex.from_document(document)
+    vectors = RulesVectors.from_documents(index.documents)
+
+    rules = list(document.rules.values())
+    glossary = list(document.glossary.values())
+    sections = {
+        "rule_numbers": (_encode_strings(r.number for r in rules), len(rules)),
+        "rule_texts": (_encode_strings(r.text for r in rules), len(rules)),
+        "rule_parents": (_encode_strings(r.parent or "" for r in rules), len(rules)),
+        "rule_examples": (_encode_strings("\n".join(r.examples) for r in rules), len(rules)),
+        "rule_references": (_encode_strings(" ".join(r.references) for r in rules), len(rules)),
+        "glossary_terms": (_encode_strings(e.term for e in glossary), len(glossary)),
+        "glossary_texts": (_encode_strings(e.text for e in glossary), len(glossary)),
+        "glossary_references": (_encode_strings(" ".join(e.references) for e in glossary), len(glossary)),
+        "index_terms": (_encode_strings(index.term_ids), len(index.term_ids)),
+        "index_offsets": (index.offsets.tobytes(), len(index.offsets)),
+        "index_docs": (index.posting_docs.tobytes(), len(index.posting_docs)),
+        "index_tfs": (index.posting_tfs.tobytes(), len(index.posting_tfs)),
+        "index_doc_lengths": (index.doc_lengths.tobytes(), len(index.doc_lengths)),
+        "embeddings": (vectors.matrix.tobytes(), len(vectors)),
+    }
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "effective_date": document.effective_date,
+        "source_sha256": file_hash(rules_file),
+        "embedding_dim": vectors.embedder.dim,
+        "sections": {},
+    }
+
+    # Sektionen liegen ausgerichtet hinter dem Header; Offsets relativ zum Datenbeginn
+    payload = bytearray()
+    for name, (data, count) in sections.items():
+        payload += b"\0" * (-len(payload) % ALIGNMENT)
+        header["sections"][name] = [len(payload), len(data), count]
+        payload += data
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * (-(PREAMBLE.size + len(header_bytes)) % ALIGNMENT)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_header(path):
+    """Liest den Header eines Artefakts (oder None, wenn ungültig)"""
+    try:
+        with open(path, "rb") as f:
+            magic, version, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                return None
+            return json.loads(f.read(header_length))
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def load_artifact(path):
+    """Mappt ein Artefakt in den Speicher und baut Regelbaum und Index darauf auf"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    _, _, header_length = PREAMBLE.unpack_from(mapped)
+    header = json.loads(mapped[PREAMBLE.size:PREAMBLE.size + header_length])
+    data_start = PREAMBLE.size + header_length
+    view = memoryview(mapped)
+
+    def section(name):
+        offset, length, count = header["sections"][name]
+        return view[data_start + offset:data_start + offset + length], count
+
+    def strings(name):
+        return _decode_strings(*section(name))
+
+    def numbers(name, typecode):
+        return section(name)[0].cast(typecode)
+
+    document = RulesDocument(effective_date=header["effective_date"])
+    for number, text, parent, example, references in zip(
+        strings("rule_numbers"),
+        strings("rule_texts"),
+        strings("rule_parents"),
+        strings("rule_examples"),
+        strings("rule_references"),
+    ):
+        rule = Rule(number, text, parent or None)
+        rule.examples = tuple(example.split("\n")) if example else ()
+        rule.references = tuple(references.split())
+        document.rules[number] = rule
+
+    children = {}
+    for number, rule in document.rules.items():
+        if rule.parent in document.rules:
+            children.setdefault(rule.parent, []).append(number)
+    for number, rule in document.rules.items():
+        rule.children = tuple(children.get(number, ()))
+
+    for term, text, references in zip(
+        strings("glossary_terms"), strings("glossary_texts"), strings("glossary_references")
+    ):
+        entry = GlossaryEntry(term, text)
+        entry.references = tuple(references.split())
+        document.glossary[term.lower()] = entry
+    document.link_references(compute=False)
+
+    # Dokumente des Index ergeben sich deterministisch aus dem Regelbaum
+    doc_numbers = []
+    documents = []
+    for number, text in document.entries():
+        doc_numbers.append(number)
+        documents.append(text)
+
+    index = RulesIndex.from_arrays(
+        documents,
+        doc_numbers,
+        strings("index_terms"),
+        numbers("index_offsets", "I"),
+        numbers("index_docs", "I"),
+        numbers("index_tfs", "H"),
+        numbers("index_doc_lengths", "I"),
+    )
+
+    data, count = section("embeddings")
+    matrix = np.frombuffer(data, dtype=np.float32).reshape(count, header["embedding_dim"])
+    return CompiledRules(document, index, header["source_sha256"], path, RulesVectors(matrix))
+
+
+def load_compiled_rules(rules_file, artifact_dir):
+    """Lädt das Artefakt zur rules.txt und baut es nur neu, wenn sich die Quelle geändert hat"""
+    if not os.path.exists(rules_file):
+        empty = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        return CompiledRules(RulesDocument(), RulesIndex([]), vectors=RulesVectors(empty))
+
+    path = artifact_path(rules_file, artifact_dir)
+    header = read_header(path)
+    if header is None or header.get("source_sha256") != file_hash(rules_file):
+        build_artifact(rules_file, path)
+    return load_artifact(path)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "rules.txt"
+    target_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(".cache", "rules")
+    target = build_artifact(source, artifact_path(source, target_dir))
+    print(f"Regel-Artefakt geschrieben: {target} ({os.path.getsize(target)} Bytes)")
@@ -0,0 +1,204 @@
+import re
+
+SECTION_PATTERN = re.compile(r"^(\d)\.\s+(.*)$")
+RULE_PATTERN = re.compile(r"^(\d{3}(?:\.\d+[a-z]?)?)\.?\s+(.*)$")
+EFFECTIVE_DATE_PATTERN = re.compile(r"effective as of (.+?)\.\s*$")
+# Verweise wie "see rule 611.3b", "702.19" oder "section 6"/"rule 903"
+REFERENCE_PATTERN = re.compile(r"\b(\d{3}\.\d+[a-z]?)\b|\brules? (\d{3})\b(?!\.\d)")
+
+
+def find_references(text):
+    """Findet alle Regelnummern, auf die ein Text verweist (in Reihenfolge, ohne Duplikate)"""
+    found = []
+    for dotted, plain in REFERENCE_PATTERN.findall(text):
+        number = dotted or plain
+        if number not in found:
+            found.append(number)
+    return found
+
+
+def parent_number(number):
+    """Ermittelt die übergeordnete Regelnummer ("611.3b" -> "611.3" -> "611" -> "6")"""
+    if "." not in number:
+        return number[0] if len(number) == 3 else None
+    major, minor = number.split(".", 1)
+    if minor[-1].isalpha():
+        return f"{major}.{minor[:-1]}"
+    return major
+
+
+class Rule:
+    """Eine Regel oder Subregel der Comprehensive Rules"""
+
+    __slots__ = ("number", "text", "parent", "children", "examples", "references")
+
+    def __init__(self, number, text, parent=None):
+        self.number = number
+        self.text = text
+        self.parent = parent
+        self.children = []
+        self.examples = []
+        # Regelnummern, auf die diese Regel verweist
+        self.references = ()
+
+    def format(self, with_examples=True):
+        """Gibt die Regel im Format der rules.txt zurück"""
+        # Subregeln ("100.1a") stehen ohne Punkt hinter der Nummer
+        separator = " " if self.number[-1].isalpha() else ". "
+        lines = [f"{self.number}{separator}{self.text}"]
+        if with_examples:
+            lines.extend(self.examples)
+        return "\n".join(lines)
+
+
+class GlossaryEntry:
+    """Ein Eintrag aus dem Glossar am Ende der rules.txt"""
+
+    __slots__ = ("term", "text", "references")
+
+    def __init__(self, term, text):
+        self.term = term
+        self.text = text
+        self.references = ()
+
+    def format(self):
+        return f"{self.term}: {self.text}"
+
+
+class RulesDocument:
+    """Strukturierte, schreibgeschützte Darstellung der Comprehensive Rules.
+
+    Wird einmal pro Prozess geparst und von allen Sessions gemeinsam genutzt.
+    """
+
+    def __init__(self, rules=None, glossary=None, effective_date=None):
+        # Regelnummer -> Rule, in Dokumentreihenfolge
+        self.rules = rules or {}
+        # Kleingeschriebener Begriff -> GlossaryEntry
+        self.glossary = glossary or {}
+        self.effective_date = effective_date
+        # Regelnummer -> Glossarbegriffe, die auf die Regel verweisen
+        self.glossary_by_rule = {}
+
+    @classmethod
+    def parse(cls, lines):
+        """Parst die Zeilen der rules.txt in Regelbaum und Glossar"""
+        lines = [line.rstrip() for line in lines]
+
+        effective_date = None
+        for line in lines[:10]:
+            match = EFFECTIVE_DATE_PATTERN.search(line)
+            if match:
+                effective_date = match.group(1)
+                break
+
+        # Inhaltsverzeichnis endet mit dem ersten "Credits", das Glossar beginnt
+        # mit dem letzten "Glossary" und endet mit dem letzten "Credits"
+        credits = [i for i, line in enumerate(lines) if line.strip() == "Credits"]
+        glossaries = [i for i, line in enumerate(lines) if line.strip() == "Glossary"]
+        body_start = credits[0] + 1 if len(credits) > 1 else 0
+        glossary_start = glossaries[-1] if len(glossaries) > 1 else len(lines)
+        glossary_end = credits[-1] if len(credits) > 1 else len(lines)
+
+        document = cls(effective_date=effective_date)
+        document._parse_rules(lines[body_start:glossary_start])
+        document._parse_glossary(lines[glossary_start + 1:glossary_end])
+        document.link_references()
+        return document
+
+    def link_references(self, compute=True):
+        """Baut den Verweisgraphen zwischen Regeln und Glossar auf.
+
+        Mit compute=False werden nur die Rückverweise aus bereits gesetzten
+        references abgeleitet (z.B. nach dem Laden aus dem Artefakt).
+        """
+        if compute:
+            for rule in self.rules.values():
+                text = " ".join((rule.text,) + tuple(rule.examples))
+                rule.references = tuple(
+                    n for n in find_references(text) if n != rule.number and n in self.rules
+                )
+            for entry in self.glossary.values():
+                entry.references = tuple(n for n in find_references(entry.text) if n in self.rules)
+
+        by_rule = {}
+        for key, entry in self.glossary.items():
+            for number in entry.references:
+                by_rule.setdefault(number, []).append(key)
+        self.glossary_by_rule = {number: tuple(keys) for number, keys in by_rule.items()}
+
+    def _parse_rules(self, lines):
+        current = None
+        for line in lines:
+            if not line.strip():
+                continue
+
+            stripped = line.strip()
+            match = SECTION_PATTERN.match(stripped) or RULE_PATTERN.match(stripped)
+            if match:
+                number, text = match.groups()
+                current = Rule(number, text, parent_number(number))
+                self.rules[number] = current
+                parent = self.rules.get(current.parent)
+                if parent is not None:
+                    parent.children.append(number)
+            elif current is None:
+                continue
+            elif stripped.startswith("Example:"):
+                current.examples.append(stripped)
+            else:
+                # Eingerückte Fortsetzungszeilen gehören zur vorherigen Regel
+                current.text = f"{current.text} {stripped}"
+
+        for rule in self.rules.values():
+            rule.children = tuple(rule.children)
+            rule.examples = tuple(rule.examples)
+
+    def _parse_glossary(self, lines):
+        block = []
+        for line in lines + [""]:
+            if line.strip():
+                block.append(line.strip())
+                continue
+            if len(block) > 1:
+                entry = GlossaryEntry(block[0], " ".join(block[1:]))
+                self.glossary[entry.term.lower()] = entry
+            block = []
+
+    def __len__(self):
+        return len(self.rules)
+
+    def get(self, number):
+        """Gibt die Regel zu einer Nummer zurück (oder None)"""
+        return self.rules.get(number)
+
+    def lookup_glossary(self, term):
+        """Gibt den Glossareintrag zu einem Begriff zurück (oder None)"""
+        return self.glossary.get(term.lower())
+
+    def ancestors(self, number):
+        """Gibt die Kette der übergeordneten Regeln zurück (nächste zuerst)"""
+        chain = []
+        rule = self.rules.get(number)
+        while rule is not None and rule.parent:
+            rule = self.rules.get(rule.parent)
+            if rule is not None:
+                chain.append(rule)
+        return chain
+
+    def glossary_for_rule(self, number):
+        """Glossareinträge, die auf eine Regel (oder deren Oberregel) verweisen"""
+        # "702.19b" -> "702.19": Glossar verweist meist auf die Hauptregel
+        while number:
+            keys = self.glossary_by_rule.get(number)
+            if keys:
+                return [self.glossary[key] for key in keys]
+            number = parent_number(number) if number[-1].isalpha() else None
+        return []
+
+    def entries(self):
+        """Liefert alle suchbaren Einträge als (Regelnummer oder None, Text)"""
+        for number, rule in self.rules.items():
+            yield number, rule.format()
+        for entry in self.glossary.values():
+            yield None, entry.format()
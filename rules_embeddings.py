@@ -0,0 +1,92 @@
+"""Lokale Vektorsuche über Regeln und Glossar.
+
+Die Vektoren sind gehashte Zeichen-N-Gramme (kein Modell, kein Download):
+unempfindlich gegen Beugung, Tippfehler und zusammengesetzte Wörter und
+damit eine gute Ergänzung zum exakten BM25-Abgleich. Alle Dokumentvektoren
+liegen normiert in einer float32-Matrix; eine Anfrage ist ein einziges
+Matrix-Vektor-Produkt. In der App standardmäßig aus (RULES_VECTOR_WEIGHT = 0),
+das Benchmark-Verfahren "vectors" misst, ob sie sich lohnt.
+"""
+import re
+import zlib
+
+import numpy as np
+
+EMBEDDING_DIM = 512
+NGRAM_SIZES = (3, 4)
+EMBED_WORD_PATTERN = re.compile(r"[a-zäöüß0-9]+")
+# Gemerkte N-Gramm-Buckets; Anfragen bringen ständig neue N-Gramme mit
+BUCKET_CACHE_LIMIT = 1 << 16
+
+
+class HashingEmbedder:
+    """Bildet Texte auf normierte Vektoren aus gehashten Zeichen-N-Grammen ab"""
+
+    def __init__(self, dim=EMBEDDING_DIM, ngram_sizes=NGRAM_SIZES):
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+        self._buckets = {}
+
+    def _bucket(self, ngram):
+        bucket = self._buckets.get(ngram)
+        if bucket is None:
+            # crc32 statt hash(): muss über Prozesse hinweg stabil sein (Artefakt)
+            value = zlib.crc32(ngram.encode("utf-8"))
+            # Vorzeichen aus einem weiteren Bit, damit sich Kollisionen im Mittel aufheben
+            bucket = (value % self.dim, 1.0 if value & 0x80000000 else -1.0)
+            if len(self._buckets) < BUCKET_CACHE_LIMIT:
+                self._buckets[ngram] = bucket
+        return bucket
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in EMBED_WORD_PATTERN.findall(text.lower()):
+            padded = f" {word} "
+            for n in self.ngram_sizes:
+                for i in range(max(1, len(padded) - n + 1)):
+                    index, sign = self._bucket(padded[i:i + n])
+                    vector[index] += sign
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_many(self, texts):
+        """Matrix mit einem normierten Vektor pro Text (Zeilen)"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self.embed(text)
+        return matrix
+
+
+class RulesVectors:
+    """Vektormatrix über alle Dokumente des Regelindex (gleiche Dokument-IDs)"""
+
+    def __init__(self, matrix, embedder=None):
+        self.matrix = matrix
+        self.embedder = embedder or HashingEmbedder(dim=matrix.shape[1])
+
+    @classmethod
+    def from_documents(cls, documents, embedder=None):
+        embedder = embedder or HashingEmbedder()
+        return cls(embedder.embed_many(documents), embedder)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def search_many(self, queries, limit=30):
+        """Top-k je Anfrage als Listen von (doc_id, cosinus) – ein Matrixprodukt für alle"""
+        if not len(self) or not queries:
+            return [[] for _ in queries]
+
+        query_matrix = self.embedder.embed_many(queries)
+        scores = query_matrix @ self.matrix.T
+        limit = min(limit, len(self))
+
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, limit - 1)[:limit]
+            top = top[np.argsort(-row[top], kind="stable")]
+            results.append([(int(doc_id), float(row[doc_id])) for doc_id in top if row[doc_id] > 0])
+        return results
+
+    def search(self, query, limit=30):
+        return self.search_many([query], limit)[0]
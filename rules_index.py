@@ -0,0 +1,143 @@
+import math
+import re
+from array import array
+
+# Regelnummern wie "611.3b", "702.19" oder "100" bleiben als ein Token erhalten
+RULE_NUMBER_PATTERN = re.compile(r"\b\d{3}(?:\.\d+[a-z]?)?\b")
+WORD_PATTERN = re.compile(r"[a-zäöüß]+")
+# Bonus für explizit genannte Regelnummern, liegt über jedem BM25-Score
+RULE_NUMBER_BOOST = 1000.0
+
+
+def normalize_term(word):
+    """Reduziert ein englisches Wort auf eine einfache Grundform (Plural-s)"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text, min_length=3):
+    """Zerlegt einen Text in Such-Tokens (Regelnummern + normalisierte Wörter)"""
+    text = text.lower()
+    tokens = RULE_NUMBER_PATTERN.findall(text)
+    for word in WORD_PATTERN.findall(text):
+        if len(word) >= min_length:
+            tokens.append(normalize_term(word))
+    return tokens
+
+
+class RulesIndex:
+    """Invertierter Index über Regeln und Glossar mit BM25-Ranking.
+
+    Die Postings liegen in flachen Arrays (ein Eintrag pro Term/Dokument-Paar),
+    eine Suche liest nur die Postings der Suchbegriffe.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, documents, doc_numbers=None):
+        self._set_documents(documents, doc_numbers)
+
+        postings = {}
+        self.doc_lengths = array("I")
+        for doc_id, text in enumerate(self.documents):
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                postings.setdefault(token, []).append((doc_id, tf))
+
+        # Term -> Term-ID, Postings des Terms liegen in [offsets[id], offsets[id + 1])
+        self.term_ids = {}
+        self.offsets = array("I", [0])
+        self.posting_docs = array("I")
+        self.posting_tfs = array("H")
+        for term_id, (term, entries) in enumerate(postings.items()):
+            self.term_ids[term] = term_id
+            for doc_id, tf in entries:
+                self.posting_docs.append(doc_id)
+                self.posting_tfs.append(min(tf, 0xFFFF))
+            self.offsets.append(len(self.posting_docs))
+
+        self._update_stats()
+
+    @classmethod
+    def from_arrays(cls, documents, doc_numbers, terms, offsets, posting_docs, posting_tfs, doc_lengths):
+        """Erstellt einen Index aus vorberechneten Arrays (z.B. per mmap aus dem Regel-Artefakt)"""
+        index = cls.__new__(cls)
+        index._set_documents(documents, doc_numbers)
+        index.term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        index.offsets = offsets
+        index.posting_docs = posting_docs
+        index.posting_tfs = posting_tfs
+        index.doc_lengths = doc_lengths
+        index._update_stats()
+        return index
+
+    def _set_documents(self, documents, doc_numbers):
+        self.documents = list(documents)
+        self.doc_numbers = list(doc_numbers or [None] * len(self.documents))
+        # Regelnummer -> Dokument-ID für direkte Treffer ("Regel 611.3b")
+        self.rule_numbers = {}
+        for doc_id, number in enumerate(self.doc_numbers):
+            if number and number not in self.rule_numbers:
+                self.rule_numbers[number] = doc_id
+
+    def _update_stats(self):
+        total = sum(self.doc_lengths)
+        self.avg_doc_length = total / len(self.doc_lengths) if len(self.doc_lengths) else 0.0
+
+    @classmethod
+    def from_document(cls, document):
+        """Baut den Index aus einem RulesDocument (Regeln und Glossar)"""
+        numbers = []
+        texts = []
+        for number, text in document.entries():
+            numbers.append(number)
+            texts.append(text)
+        return cls(texts, numbers)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def idf(self, term_id):
+        """Inverse Dokumentfrequenz eines Terms (BM25-Variante, immer positiv)"""
+        df = self.offsets[term_id + 1] - self.offsets[term_id]
+        n = len(self.documents)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query, limit=30):
+        """Gibt die relevantesten Dokumente als Liste von (doc_id, score) zurück"""
+        if not self.documents:
+            return []
+
+        scores = {}
+        k1 = self.K1
+        b = self.B
+        avgdl = self.avg_doc_length or 1.0
+
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+
+            idf = self.idf(term_id)
+            for pos in range(self.offsets[term_id], self.offsets[term_id + 1]):
+                doc_id = self.posting_docs[pos]
+                tf = self.posting_tfs[pos]
+                norm = k1 * (1 - b + b * self.doc_lengths[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        # Explizit genannte Regelnummern stehen immer ganz oben
+        for number in RULE_NUMBER_PATTERN.findall(query.lower()):
+            doc_id = self.rule_numbers.get(number)
+            if doc_id is not None:
+                scores[doc_id] = scores.get(doc_id, 0.0) + RULE_NUMBER_BOOST
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
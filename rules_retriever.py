@@ -0,0 +1,179 @@
+from database import MTG_VOCABULARY
+from keyword_table import KeywordTable
+from prompt_builder import count_tokens
+from rules_document import find_references
+from rules_index import RULE_NUMBER_BOOST
+from vocabulary import QueryExpander, parse_vocabulary
+
+# Dämpfung der Rangfusion (Reciprocal Rank Fusion, üblicher Wert)
+RRF_K = 60
+# Höchstens so viele Schlüsselwörter werden vorab in den Kontext geholt
+KEYWORD_LIMIT = 4
+
+
+class RulesRetriever:
+    """Sucht Regeln über den Index und ergänzt Kontext aus dem Verweisgraphen.
+
+    Die Suche ist hybrid: deutsche Begriffe werden um ihre englischen
+    Entsprechungen ergänzt, dann werden BM25- und (mit vector_weight > 0)
+    Vektor-Rangliste über ihre Ränge zusammengeführt. Zu jedem Treffer werden Oberregeln, referenzierte
+    Regeln und passende Glossareinträge nachgeladen, bis das Token-Budget
+    erschöpft ist. Alle Verweise sind vorberechnet und werden per
+    Dictionary-Lookup aufgelöst. In der Frage zitierte Regeln, Regelverweise
+    der Spezialregeln und Schlüsselwörter aus Frage und Oracle-Texten
+    (KeywordTable, mit Glossar und Regelabschnitt) kommen vor allen Treffern,
+    sowohl bei der Aufnahme als auch im fertigen Kontext.
+    """
+
+    def __init__(self, compiled, expander=None, vector_weight=0.5, keywords=None):
+        self.document = compiled.document
+        self.index = compiled.index
+        self.vectors = compiled.vectors
+        self.expander = expander
+        self.vector_weight = vector_weight
+        self.keywords = keywords
+
+        # Glossareinträge folgen im Index direkt auf die Regeln
+        offset = len(self.document.rules)
+        self.glossary_entries = list(self.document.glossary.values())
+        self.glossary_doc_ids = {
+            key: offset + i for i, key in enumerate(self.document.glossary)
+        }
+
+    @classmethod
+    def hybrid(cls, compiled, vector_weight=0.5, vocabulary=MTG_VOCABULARY):
+        """Vollständige Suche: Vokabular-Erweiterung, Vektoren und Schlüsselwort-Tabelle"""
+        expander = QueryExpander(parse_vocabulary(vocabulary))
+        return cls(
+            compiled,
+            expander=expander,
+            vector_weight=vector_weight,
+            keywords=KeywordTable.from_document(compiled.document, expander)
+        )
+
+    def doc_id_for_rule(self, number):
+        return self.index.rule_numbers.get(number)
+
+    def related(self, doc_id):
+        """Dokument-IDs von Oberregeln, Verweisen und Glossar zu einem Treffer"""
+        number = self.index.doc_numbers[doc_id]
+        related = []
+
+        if number is None:
+            entry = self.glossary_entries[doc_id - len(self.document.rules)]
+            related.extend(self.doc_id_for_rule(n) for n in entry.references)
+        else:
+            rule = self.document.get(number)
+            # Oberregeln bis zur dreistelligen Regel ("611"), ohne Kapitelüberschrift
+            related.extend(
+                self.doc_id_for_rule(parent.number)
+                for parent in self.document.ancestors(number)
+                if len(parent.number) >= 3
+            )
+            related.extend(self.doc_id_for_rule(n) for n in rule.references)
+            related.extend(
+                self.glossary_doc_ids[entry.term.lower()]
+                for entry in self.document.glossary_for_rule(number)
+            )
+
+        return [doc_id for doc_id in related if doc_id is not None]
+
+    def keyword_doc_ids(self, query, card_texts=()):
+        """Glossar, Abschnittsüberschrift und Unterregeln der gefundenen Schlüsselwörter"""
+        if self.keywords is None:
+            return []
+
+        # Schlüsselwörter der Frage zuerst, dann die der Karten
+        entries = {}
+        for entry in self.keywords.lookup(query):
+            entries.setdefault(entry.rule, entry)
+        for text in card_texts:
+            for entry in self.keywords.lookup_oracle_text(text):
+                entries.setdefault(entry.rule, entry)
+
+        doc_ids = []
+        for entry in list(entries.values())[:KEYWORD_LIMIT]:
+            if entry.glossary is not None:
+                doc_ids.append(self.glossary_doc_ids.get(entry.glossary))
+            rule = self.document.get(entry.rule)
+            if rule is not None:
+                doc_ids.append(self.doc_id_for_rule(rule.number))
+                doc_ids.extend(self.doc_id_for_rule(child) for child in rule.children)
+        return [doc_id for doc_id in doc_ids if doc_id is not None]
+
+    def search(self, query, limit=30):
+        """Hybride Suche, gibt (doc_id, score) absteigend sortiert zurück"""
+        if self.expander is not None:
+            query = self.expander.expand(query)
+
+        lexical = self.index.search(query, limit=limit * 2)
+        if self.vectors is None or not self.vector_weight:
+            return lexical[:limit]
+        semantic = self.vectors.search(query, limit=limit * 2)
+
+        scores = {}
+        for weight, ranking in ((1 - self.vector_weight, lexical), (self.vector_weight, semantic)):
+            for rank, (doc_id, _) in enumerate(ranking):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight / (RRF_K + rank + 1)
+
+        # Explizit genannte Regelnummern bleiben vorne
+        for doc_id, score in lexical:
+            if score >= RULE_NUMBER_BOOST:
+                scores[doc_id] += 1.0
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def priority_doc_ids(self, query, rule_refs=(), card_texts=()):
+        """In der Frage zitierte Regeln, Regelverweise (Spezialregeln), dann Schlüsselwörter"""
+        numbers = find_references(query) + list(rule_refs)
+        priority = [self.doc_id_for_rule(number) for number in numbers]
+        priority += self.keyword_doc_ids(query, card_texts)
+        return [doc_id for doc_id in dict.fromkeys(priority) if doc_id is not None]
+
+    def ranked(self, query, rule_refs=(), limit=30, card_texts=(), priority=None):
+        """Dokument-IDs in Aufnahme-Reihenfolge: Vorrang (priority_doc_ids), dann Suchtreffer"""
+        if priority is None:
+            priority = self.priority_doc_ids(query, rule_refs, card_texts)
+        ranked = list(priority) + [doc_id for doc_id, _ in self.search(query, limit=limit)]
+        return list(dict.fromkeys(ranked))
+
+    def retrieve(self, query, rule_refs=(), token_budget=2500, limit=30, card_texts=()):
+        """Gibt die Regeltexte für eine Frage zurück (Vorrang-Regeln zuerst, Rest in Dokumentreihenfolge).
+
+        Der PromptBuilder kürzt von hinten: zitierte Regeln, Regelverweise und
+        Schlüsselwörter stehen deshalb vorne.
+        """
+        selected = {}
+        used = 0
+
+        def add(doc_id):
+            nonlocal used
+            if doc_id in selected:
+                return
+            cost = count_tokens(self.index.documents[doc_id])
+            if used + cost <= token_budget:
+                selected[doc_id] = cost
+                used += cost
+
+        priority = self.priority_doc_ids(query, rule_refs, card_texts)
+        primary = self.ranked(query, rule_refs, limit, card_texts, priority)
+
+        # 1. Beste Treffer bis zur Hälfte des Budgets
+        for doc_id in primary:
+            if used >= token_budget // 2:
+                break
+            add(doc_id)
+
+        # 2. Kontext (Oberregeln, Verweise, Glossar) der aufgenommenen Treffer
+        for doc_id in [d for d in primary if d in selected]:
+            for related_id in self.related(doc_id):
+                add(related_id)
+
+        # 3. Restbudget mit weiteren Treffern auffüllen
+        for doc_id in primary:
+            add(doc_id)
+
+        first = [doc_id for doc_id in priority if doc_id in selected]
+        rest = sorted(doc_id for doc_id in selected if doc_id not in priority)
+        return [self.index.documents[doc_id] for doc_id in first + rest]
@@ -0,0 +1,155 @@
+"""Gemeinsamer Scryfall-Client für alle API-Aufrufe der App.
+
+- Persistenter Connection-Pool (Keep-Alive statt neuem TLS-Handshake pro Aufruf)
+- Retry mit Backoff bei 429/5xx und Verbindungsfehlern (Retry-After wird beachtet)
+- Ratenlimit über einen Token-Bucket, geteilt von allen Threads (auch für Retries)
+- Gleichzeitige identische GET-Anfragen werden zu einer zusammengefasst
+- Batch-Lookups über /cards/collection
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import TokenBucket
+
+# Maximale Anzahl Identifier pro /cards/collection-Anfrage (Scryfall-Limit)
+COLLECTION_BATCH_SIZE = 75
+# Antworten, nach denen die Anfrage wiederholt wird
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_BACKOFF = 0.5  # Sekunden, verdoppelt sich pro Versuch
+RETRY_AFTER_MAX = 30  # Längere Retry-After-Angaben werden gekürzt
+
+
+class ScryfallClient:
+    """Threadsicherer Client für die Scryfall-API"""
+
+    def __init__(self, base_url, rate_limit=10, pool_size=8, timeout=5, max_retries=3,
+                 user_agent="MonsterMagicMastermind/1.0"):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucket(rate_limit)
+        self.request_count = 0
+
+        # Retries laufen über _request (und damit über den Token-Bucket), nicht in urllib3
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Scryfall verlangt einen aussagekräftigen User-Agent und Accept-Header
+        self.session.headers.update({"User-Agent": user_agent, "Accept": "application/json"})
+
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _request(self, method, path, **kwargs):
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        timeout = kwargs.pop("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            # Jeder Versuch kostet ein Token, auch Wiederholungen
+            if not self.rate_limiter.acquire(timeout=self.timeout):
+                raise TimeoutError("Scryfall-Ratenlimit erreicht")
+            self.request_count += 1
+            last_attempt = attempt == self.max_retries
+            try:
+                res = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt:
+                    raise
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+                continue
+
+            if res.status_code not in RETRY_STATUSES or last_attempt:
+                return res
+            delay = self._retry_after(res)
+            res.close()
+            time.sleep(RETRY_BACKOFF * 2 ** attempt if delay is None else delay)
+
+    @staticmethod
+    def _retry_after(res):
+        """Wartezeit aus dem Retry-After-Header in Sekunden (None, wenn keine Zahl)"""
+        try:
+            return min(float(res.headers["Retry-After"]), RETRY_AFTER_MAX)
+        except (KeyError, ValueError):
+            return None
+
+    def get(self, path, params=None):
+        """GET mit JSON-Antwort; None bei 404, Exception bei anderen Fehlern"""
+        key = (path, tuple(sorted((params or {}).items())))
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            res = self._request("GET", path, params=params)
+            if res.status_code == 404:
+                result = None
+            else:
+                res.raise_for_status()
+                result = res.json()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def autocomplete(self, query):
+        """Kartennamen-Vorschläge (bis zu 20)"""
+        data = self.get("/cards/autocomplete", {"q": query})
+        return data.get("data", []) if data else []
+
+    def named(self, exact):
+        """Karte über den exakten Namen (None, wenn unbekannt)"""
+        return self.get("/cards/named", {"exact": exact})
+
+    def card(self, card_id):
+        """Karte über die Scryfall-ID (None, wenn unbekannt)"""
+        return self.get(f"/cards/{card_id}")
+
+    def rulings(self, card_id):
+        """Rulings einer Karte als Liste von Kommentaren (None, wenn unbekannt)"""
+        data = self.get(f"/cards/{card_id}/rulings")
+        if data is None:
+            return None
+        return [r["comment"] for r in data.get("data", [])]
+
+    def collection(self, identifiers):
+        """Löst viele Karten mit möglichst wenigen Anfragen auf.
+
+        identifiers sind Scryfall-Identifier wie {"name": ...} oder {"id": ...}.
+        Gibt (gefundene Karten, nicht gefundene Identifier) zurück.
+        """
+        found = []
+        not_found = []
+        for start in range(0, len(identifiers), COLLECTION_BATCH_SIZE):
+            batch = identifiers[start:start + COLLECTION_BATCH_SIZE]
+            res = self._request("POST", "/cards/collection", json={"identifiers": batch})
+            res.raise_for_status()
+            data = res.json()
+            found.extend(data.get("data", []))
+            not_found.extend(data.get("not_found", []))
+        return found, not_found
+
+    def bulk_data(self, bulk_type):
+        """Metadaten eines Bulk-Downloads (updated_at, download_uri, ...)"""
+        return self.get(f"/bulk-data/{bulk_type}")
+
+    def download(self, url, file, chunk_size=1 << 20, timeout=60):
+        """Lädt eine (große) Datei gestreamt in ein geöffnetes Dateiobjekt"""
+        with self._request("GET", url, stream=True, timeout=timeout) as res:
+            res.raise_for_status()
+            for chunk in res.iter_content(chunk_size=chunk_size):
+                file.write(chunk)
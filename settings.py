@@ -0,0 +1,97 @@
+"""Einstellungen ohne Streamlit-Abhängigkeit (App, API-Server, Benchmark)"""
+import os
+
+
+# Caches und kompilierte Artefakte (Umgebung: z.B. eigenes Verzeichnis für Lasttests)
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+
+class Settings:
+    """Zentrale Konfiguration, von AppConfig um die Streamlit-Teile erweitert"""
+    
+    # App-Metadaten
+    PAGE_TITLE = "Monster Magic Mastermind"
+    PAGE_ICON = "🧙‍♂️"
+    LAYOUT = "wide"
+    
+    # API-Konfiguration
+    API_BASE_URL = os.getenv("API_BASE_URL", "https://api.deepseek.com")
+    MODEL_NAME = "deepseek-chat"
+    PROMPT_TOKEN_BUDGET = 12000  # System-Nachricht + Verlauf pro Anfrage
+    LLM_TIMEOUT = 60  # Sekunden ohne neue Daten, bevor der Stream abbricht
+    LLM_CONNECT_TIMEOUT = 10
+    LLM_MAX_RETRIES = 2
+    LLM_MAX_CONCURRENCY = 16  # Gleichzeitige LLM-Anfragen insgesamt (Judge-API: geteilt durch API_WORKERS)
+    LLM_QUEUE_TIMEOUT = 30  # Maximale Wartezeit auf einen freien Platz
+    
+    # Chat-Verlauf: letzte Runden wörtlich, ältere nur als Zusammenfassung
+    HISTORY_KEEP_TURNS = 4
+    HISTORY_SUMMARY_TOKENS = 600
+    HISTORY_MAX_ARCHIVED = 100  # Ältere Nachrichten, die noch angezeigt werden können
+    
+    # Antwort-Cache für wiederkehrende Fragen (nur erste Frage eines Gesprächs)
+    ANSWER_CACHE_ENABLED = True
+    ANSWER_CACHE_FILE = os.path.join(CACHE_DIR, "answers.sqlite")
+    ANSWER_CACHE_TTL = 7 * 24 * 3600
+    ANSWER_CACHE_SIMILARITY = None  # Jaccard-Schwelle (Wortpaare) für ähnliche Fragen, None = nur exakt
+    ANSWER_CACHE_MAX_ROWS = 50000  # Älteste Antworten darüber werden beim Aufräumen entfernt
+    
+    # Regelwerk
+    RULES_FILE = "rules.txt"
+    RULES_ARTIFACT_DIR = os.path.join(CACHE_DIR, "rules")  # Kompiliertes Regel-Artefakt
+    RULES_CONTEXT_LIMIT = 30  # Maximale Anzahl Suchtreffer im Kontext
+    RULES_CONTEXT_TOKEN_BUDGET = 2500  # Inkl. Oberregeln, Verweisen und Glossar
+    SPECIAL_CASES_FILE = os.path.join("data", "special_cases.json")
+    # Anteil der Vektorsuche an der hybriden Rangliste (0 = nur BM25). Aus, weil sie sich nicht
+    # lohnt: python benchmark.py --repeat 3 ergab mit 0.4 recall@10 0.75 / Kontext 0.889 bei
+    # p50 4.3 ms, mit 0 0.729 / 0.889 bei 1.9 ms (Verfahren "vectors" misst das weiter)
+    RULES_VECTOR_WEIGHT = 0
+    
+    # Scryfall API
+    SCRYFALL_BASE_URL = os.getenv("SCRYFALL_BASE_URL", "https://api.scryfall.com")
+    SCRYFALL_RATE_LIMIT = 10  # Anfragen pro Sekunde (Scryfall bittet um 50-100 ms Abstand)
+    SCRYFALL_MAX_WORKERS = 8  # Parallele Anfragen / Größe des Connection-Pools
+    SCRYFALL_TIMEOUT = 5  # Sekunden pro Anfrage
+    SCRYFALL_MAX_RETRIES = 3  # Bei 429/5xx, mit exponentiellem Backoff
+    RULINGS_DEADLINE = 8  # Sekunden für alle Rulings einer Frage zusammen
+    
+    # Lokaler Kartenbestand (Scryfall Bulk Data), ohne Datei wird die API genutzt
+    SCRYFALL_BULK_TYPE = "oracle-cards"
+    SCRYFALL_BULK_FILE = os.path.join("data", "oracle-cards.json")
+    SCRYFALL_BULK_REFRESH_INTERVAL = 24 * 3600  # Sekunden, None = nie aktualisieren
+    AUTOCOMPLETE_LIMIT = 20
+    
+    # Cache-Einstellungen
+    CACHE_TTL = 3600  # 1 Stunde (Rulings)
+    CARD_CACHE_FILE = os.path.join(CACHE_DIR, "scryfall.sqlite")  # Geteilt von allen Workern
+    CARD_CACHE_TTL = 24 * 3600  # Kartendaten
+    CARD_CACHE_NEGATIVE_TTL = 600  # "Karte nicht gefunden"
+    CARD_CACHE_MEMORY_ENTRIES = 2000
+    CARD_CACHE_DISK_ENTRIES = 50000
+    
+    # Vorschaubilder für das Karten-Grid (doppelte Grid-Breite für hochauflösende Displays)
+    IMAGE_CACHE_DIR = os.path.join(CACHE_DIR, "images")
+    IMAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+    IMAGE_THUMBNAIL_WIDTH = 300
+    IMAGE_CACHE_MEMORY_ENTRIES = 256
+    IMAGE_PREFETCH_WORKERS = 8  # Parallele Bild-Downloads (CDN, ohne Scryfall-Ratenlimit)
+    IMAGE_DOWNLOAD_TIMEOUT = 15  # Sekunden pro Bild
+    
+    # Telemetrie: JSON-Log pro Anfrage (Logger "telemetry") + Prometheus-Endpunkt
+    METRICS_ENABLED = True
+    METRICS_HOST = "127.0.0.1"
+    METRICS_PORT = 9108
+    
+    # Judge-API (judge_api.py): ohne JUDGE_API_URL nutzt die App den Kern im eigenen Prozess
+    JUDGE_API_URL = os.getenv("JUDGE_API_URL")  # z.B. "http://127.0.0.1:8000"
+    API_HOST = "127.0.0.1"
+    API_PORT = 8000
+    API_WORKERS = int(os.getenv("API_WORKERS", "4"))  # Prozesse, jeder mit eigenem Index im Speicher (Caches per SQLite geteilt)
+    API_TIMEOUT = 90  # Sekunden, die die App auf Daten der API wartet
+    API_THREADS = 64  # Threads pro Worker für blockierende Schritte und laufende Streams
+    RULES_CONTEXT_CACHE_ENTRIES = 512  # Regelkontexte pro Prozess (Frage + Karten)
+    
+    @staticmethod
+    def get_api_key():
+        """Holt den API-Key aus den Umgebungsvariablen"""
+        return os.getenv("DEEPSEEK_API_KEY")
@@ -0,0 +1,154 @@
+"""Spezialregeln für knifflige Karten und Kartenkombinationen.
+
+Die Einträge stehen in data/special_cases.json:
+    cards:        {"name", "note", optional "aliases", "oracle_ids"}
+    keywords:     {"keyword", "note"}
+    interactions: {"cards": [Name oder Oracle-ID, ...], "note"}
+
+Karten werden über den normalisierten Namen (auch einzelner Seiten und
+Aliase), die Oracle-ID und ihre Schlüsselwörter zugeordnet. Welche Hinweise
+für eine Kartenauswahl gelten, berechnet die App beim Hinzufügen/Entfernen
+einer Karte einmal und hält sie in der Session; zustandslose Aufrufer (die
+Judge-API) nutzen for_selection(), das pro Kartenauswahl gemerkt wird.
+"""
+import json
+import os
+
+from card_cache import LRUCache
+from card_store import normalize_name
+from rules_document import find_references
+
+
+class SpecialNote:
+    """Ein Hinweis mit vorberechneten Regelverweisen"""
+
+    __slots__ = ("title", "text", "references")
+
+    def __init__(self, title, text):
+        self.title = title
+        self.text = text
+        self.references = tuple(find_references(text))
+
+    def format(self):
+        return f"\n!!! {self.title}:\n{self.text}\n"
+
+
+class SpecialCases:
+    """Ergebnis für eine Kartenauswahl: Hinweise in fester Reihenfolge"""
+
+    __slots__ = ("notes",)
+
+    def __init__(self, notes=()):
+        self.notes = tuple(notes)
+
+    @property
+    def text(self):
+        return "\n".join(note.format() for note in self.notes)
+
+    @property
+    def references(self):
+        return tuple(ref for note in self.notes for ref in note.references)
+
+    def __bool__(self):
+        return bool(self.notes)
+
+
+class SpecialCaseEngine:
+    """Index über Spezialregeln nach Name, Oracle-ID und Schlüsselwort"""
+
+    # Gemerkte Ergebnisse von for_selection()
+    SELECTION_CACHE_ENTRIES = 1024
+
+    def __init__(self, data):
+        self.by_key = {}
+        self.by_keyword = {}
+        self.interactions = []
+        self.selections = LRUCache(self.SELECTION_CACHE_ENTRIES)
+
+        for entry in data.get("cards", []):
+            note = SpecialNote(f"SPEZIALREGEL FÜR {entry['name']}", entry["note"])
+            keys = [normalize_name(entry["name"])]
+            keys += [normalize_name(alias) for alias in entry.get("aliases", [])]
+            keys += entry.get("oracle_ids", [])
+            for key in keys:
+                self.by_key.setdefault(key, []).append(note)
+
+        for entry in data.get("keywords", []):
+            note = SpecialNote(f"SPEZIALREGEL FÜR {entry['keyword']}", entry["note"])
+            self.by_keyword.setdefault(entry["keyword"].lower(), []).append(note)
+
+        for entry in data.get("interactions", []):
+            title = "INTERAKTION " + " + ".join(entry["cards"])
+            participants = tuple(self._participant_key(card) for card in entry["cards"])
+            self.interactions.append((participants, SpecialNote(title, entry["note"])))
+
+    @staticmethod
+    def _participant_key(value):
+        # Oracle-IDs sind UUIDs und werden unverändert übernommen
+        return value if len(value) == 36 and value.count("-") == 4 else normalize_name(value)
+
+    @classmethod
+    def load(cls, path):
+        """Lädt die Spezialregeln (leere Engine, wenn die Datei fehlt)"""
+        if not os.path.exists(path):
+            return cls({})
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def card_keys(card):
+        """Alle Schlüssel, unter denen eine Karte gefunden wird (Name, Seiten, Oracle-ID)"""
+        keys = {normalize_name(card.name)}
+        keys.update(normalize_name(face.name) for face in card.faces)
+        # "Delver of Secrets // Insectile Aberration" auch ohne card_faces
+        keys.update(normalize_name(part) for part in card.name.split(" // "))
+        if card.oracle_id:
+            keys.add(card.oracle_id)
+        return keys
+
+    def applicable(self, cards):
+        """Alle Hinweise für eine Kartenauswahl (Karten, Schlüsselwörter, Kartenpaare)"""
+        notes = {}
+        keys_per_card = []
+        for card in cards:
+            keys = self.card_keys(card)
+            keys_per_card.append(keys)
+            for key in keys:
+                for note in self.by_key.get(key, ()):
+                    notes.setdefault(id(note), note)
+            for keyword in card.keywords:
+                for note in self.by_keyword.get(keyword.lower(), ()):
+                    notes.setdefault(id(note), note)
+
+        for participants, note in self.interactions:
+            if self._all_present(participants, keys_per_card):
+                notes.setdefault(id(note), note)
+
+        return SpecialCases(notes.values())
+
+    def for_selection(self, cards):
+        """Wie applicable(), aber pro Kartenauswahl (Menge der Kartenschlüssel) gemerkt"""
+        cards = list(cards)
+        selection = frozenset(
+            (frozenset(self.card_keys(card)), frozenset(k.lower() for k in card.keywords))
+            for card in cards
+        )
+        special = self.selections.get(selection)
+        if special is None:
+            special = self.applicable(cards)
+            self.selections.set(selection, special, float("inf"))
+        return special
+
+    @staticmethod
+    def _all_present(participants, keys_per_card):
+        """Jeder Beteiligte muss zu einer anderen Karte der Auswahl passen"""
+        used = set()
+        for participant in participants:
+            match = next(
+                (i for i, keys in enumerate(keys_per_card) if i not in used and participant in keys),
+                None
+            )
+            if match is None:
+                return False
+            used.add(match)
+        return True
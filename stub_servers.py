@@ -0,0 +1,214 @@
+"""Lokale Stand-ins für Scryfall und ein OpenAI-kompatibles LLM (für Lasttests).
+
+Der Scryfall-Stub beantwortet autocomplete, named, cards/{id}, rulings und
+cards/collection aus den (synthetischen) Benchmark-Fixtures; der LLM-Stub streamt
+/chat/completions als Server-Sent Events mit einstellbarer Zeit bis zum
+ersten Token und Token-Rate. Beide laufen mit der Standardbibliothek.
+
+    python stub_servers.py --llm-ttft 300 --llm-tokens 200
+
+Die App bzw. die Judge-API nutzen die Stubs über die Umgebung, mit eigenem
+Cache-Verzeichnis, damit keine Stub-Daten in den echten Caches landen:
+    CACHE_DIR=/tmp/mtg-loadtest SCRYFALL_BASE_URL=http://127.0.0.1:9190 \
+    API_BASE_URL=http://127.0.0.1:9191 python judge_api.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from card_store import CardStore
+
+FIXTURES_FILE = "benchmarks/fixtures/synthetic.json"
+SCRYFALL_PORT = 9190
+LLM_PORT = 9191
+
+
+class StubServer(ThreadingHTTPServer):
+    """HTTP-Server, dessen Einstellungen die Handler lesen"""
+
+    daemon_threads = True
+    # Viele gleichzeitige Sessions öffnen viele Verbindungen
+    request_queue_size = 1024
+
+    def __init__(self, address, handler, **options):
+        super().__init__(address, handler)
+        self.options = options
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ScryfallHandler(JSONHandler):
+    """Scryfall-Endpunkte, die die App nutzt, über einen festen Kartenbestand"""
+
+    def respond(self, method):
+        time.sleep(self.server.options["latency"])
+        store = self.server.options["store"]
+        rulings = self.server.options["rulings"]
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+
+        if method == "POST" and url.path == "/cards/collection":
+            found, not_found = [], []
+            for identifier in self.read_json().get("identifiers", []):
+                card = store.get_by_name(identifier.get("name", "")) or store.get_by_id(identifier.get("id"))
+                (found if card else not_found).append(card or identifier)
+            return self.send_json({"object": "list", "data": found, "not_found": not_found})
+        if url.path == "/cards/autocomplete":
+            return self.send_json({"object": "catalog", "data": store.autocomplete(query.get("q", ""))})
+        if url.path == "/cards/named":
+            card = store.get_by_name(query.get("exact", ""))
+        elif len(parts) == 3 and parts[0] == "cards" and parts[2] == "rulings":
+            card = store.get_by_id(parts[1])
+            if card is not None:
+                comments = rulings.get(card["id"], [])
+                return self.send_json({"object": "list", "data": [{"comment": c} for c in comments]})
+        elif len(parts) == 2 and parts[0] == "cards":
+            card = store.get_by_id(parts[1])
+        else:
+            card = None
+
+        if card is None:
+            return self.send_json({"object": "error", "status": 404}, status=404)
+        return self.send_json(card)
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def do_POST(self):
+        self.respond("POST")
+
+
+class LLMHandler(JSONHandler):
+    """OpenAI-kompatibles /chat/completions mit simulierter Generierung"""
+
+    def do_POST(self):
+        request = self.read_json()
+        options = self.server.options
+        prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 4
+        words = [f"Wort{i} " for i in range(options["tokens"])]
+
+        time.sleep(options["ttft"])
+        if not request.get("stream"):
+            return self.send_json({
+                "id": "stub", "object": "chat.completion", "created": int(time.time()),
+                "model": request.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(words)}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                          "total_tokens": prompt_tokens + len(words)},
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for i, word in enumerate(words):
+                if i:
+                    time.sleep(options["interval"])
+                self.send_event(request, {"index": 0, "delta": {"content": word}, "finish_reason": None})
+            self.send_event(request, {"index": 0, "delta": {}, "finish_reason": "stop"})
+            if request.get("stream_options", {}).get("include_usage"):
+                self.send_event(request, None, usage={
+                    "prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                    "total_tokens": prompt_tokens + len(words),
+                })
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client hat abgebrochen
+
+    def send_event(self, request, choice, usage=None):
+        chunk = {
+            "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": request.get("model"), "choices": [choice] if choice else [],
+        }
+        if usage is not None:
+            chunk["usage"] = usage
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def start_server(server, name):
+    threading.Thread(target=server.serve_forever, name=name, daemon=True).start()
+    return server
+
+
+def start_scryfall_stub(fixtures_file=FIXTURES_FILE, host="127.0.0.1", port=SCRYFALL_PORT, latency=0.05):
+    """Startet den Scryfall-Stub in einem Hintergrund-Thread (port=0: freier Port)"""
+    with open(fixtures_file, "r", encoding="utf-8") as f:
+        fixtures = json.load(f)
+    server = StubServer(
+        (host, port), ScryfallHandler, latency=latency,
+        store=CardStore(fixtures["cards"].values()), rulings=fixtures["rulings"]
+    )
+    return start_server(server, "scryfall-stub")
+
+
+def start_llm_stub(host="127.0.0.1", port=LLM_PORT, ttft=0.3, tokens=150, interval=0.01):
+    """Startet den LLM-Stub in einem Hintergrund-Thread (port=0: freier Port)"""
+    server = StubServer((host, port), LLMHandler, ttft=ttft, tokens=tokens, interval=interval)
+    return start_server(server, "llm-stub")
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def add_stub_arguments(parser):
+    parser.add_argument("--scryfall-latency", type=float, default=50, help="ms pro Scryfall-Anfrage")
+    parser.add_argument("--llm-ttft", type=float, default=300, help="ms bis zum ersten Token")
+    parser.add_argument("--llm-tokens", type=int, default=150, help="Tokens pro Antwort")
+    parser.add_argument("--llm-interval", type=float, default=10, help="ms zwischen zwei Tokens")
+
+
+def start_stubs(args, scryfall_port=SCRYFALL_PORT, llm_port=LLM_PORT):
+    """Startet beide Stubs mit den Einstellungen aus add_stub_arguments"""
+    scryfall = start_scryfall_stub(port=scryfall_port, latency=args.scryfall_latency / 1000)
+    llm = start_llm_stub(
+        port=llm_port, ttft=args.llm_ttft / 1000, tokens=args.llm_tokens,
+        interval=args.llm_interval / 1000
+    )
+    return scryfall, llm
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scryfall-port", type=int, default=SCRYFALL_PORT)
+    parser.add_argument("--llm-port", type=int, default=LLM_PORT)
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    scryfall, llm = start_stubs(args, args.scryfall_port, args.llm_port)
+    print(f"SCRYFALL_BASE_URL={base_url(scryfall)} API_BASE_URL={base_url(llm)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
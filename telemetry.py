@@ -0,0 +1,236 @@
+"""Tracing und Metriken für die Chat-Pipeline.
+
+Jede Anfrage läuft in einem Trace; Abschnitte darin werden mit span()
+gemessen. Am Ende wird eine JSON-Zeile pro Anfrage geloggt (Logger
+"telemetry"), und alle Zeiten landen zusätzlich in Histogrammen, die ein
+kleiner HTTP-Server im Prometheus-Textformat unter /metrics ausliefert.
+Zähler vorhandener Komponenten (Caches, Scryfall-Client) werden über
+Collector-Funktionen erst beim Abruf gelesen.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("telemetry")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRIC_PREFIX = "mtg_judge_"
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Metrics:
+    """Zähler und Histogramme mit Labels, threadsicher"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, labels=None):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts, total = series.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[key] = (counts, total + value)
+            # Anzahl steht in einem eigenen Zähler, damit +Inf korrekt ist
+            totals = self._counters.setdefault(f"{name}__count", {})
+            totals[key] = totals.get(key, 0) + 1
+
+    def register_collector(self, collect):
+        """collect() liefert [(name, typ, labels, wert)] und wird bei jedem Abruf aufgerufen"""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        """Alle Metriken im Prometheus-Textformat"""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            collectors = list(self._collectors)
+
+        def header(name, kind):
+            full = METRIC_PREFIX + name
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        for name, series in sorted(counters.items()):
+            if name.endswith("__count"):
+                continue
+            full = header(name, "counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{full}{_format_labels(key)} {value}")
+
+        for name, series in sorted(histograms.items()):
+            full = header(name, "histogram")
+            totals = counters.get(f"{name}__count", {})
+            for key, (counts, total) in sorted(series.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{full}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{full}_bucket{_format_labels(key, [('le', '+Inf')])} {totals.get(key, 0)}")
+                lines.append(f"{full}_sum{_format_labels(key)} {total:.6f}")
+                lines.append(f"{full}_count{_format_labels(key)} {totals.get(key, 0)}")
+
+        collected = {}
+        for collect in collectors:
+            try:
+                for name, kind, labels, value in collect():
+                    collected.setdefault((name, kind), []).append((_label_key(labels), value))
+            except Exception as e:
+                logger.warning("Metrik-Collector fehlgeschlagen: %s", e)
+        for (name, kind), series in sorted(collected.items()):
+            full = header(name, kind)
+            for key, value in series:
+                lines.append(f"{full}{_format_labels(key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("request_seconds", "Dauer einer Anfrage (Trace) in Sekunden")
+metrics.describe("stage_seconds", "Dauer einzelner Abschnitte einer Anfrage in Sekunden")
+metrics.describe("requests_total", "Anfragen nach Art und Ergebnis")
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    """Zeiten und Attribute einer Anfrage"""
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add_span(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def finish(self, status="ok"):
+        duration = time.perf_counter() - self.started
+        metrics.observe("request_seconds", duration, {"request": self.name})
+        metrics.inc("requests_total", labels={"request": self.name, "status": status})
+        record = {
+            "event": self.name,
+            "trace_id": self.id,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "spans_ms": {name: round(s * 1000, 2) for name, s in self.spans.items()},
+            **self.attributes,
+        }
+        logger.info(json.dumps(record, ensure_ascii=False, default=str))
+        return record
+
+
+@contextmanager
+def trace(name, **attributes):
+    """Startet einen Trace für die Dauer des with-Blocks"""
+    current = Trace(name, **attributes)
+    token = _current_trace.set(current)
+    status = "ok"
+    try:
+        yield current
+    except BaseException as e:
+        # Auch Streamlit-Reruns (Abbruch mitten im Skript) werden als solche erfasst
+        status = type(e).__name__
+        raise
+    finally:
+        _current_trace.reset(token)
+        current.finish(status)
+
+
+@contextmanager
+def span(name):
+    """Misst einen Abschnitt und ordnet ihn dem laufenden Trace zu (falls vorhanden)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+
+def record_span(name, seconds):
+    metrics.observe("stage_seconds", seconds, {"stage": name})
+    current = _current_trace.get()
+    if current is not None:
+        current.add_span(name, seconds)
+
+
+def annotate(**attributes):
+    """Ergänzt Attribute am laufenden Trace (z.B. Token-Zahlen)"""
+    current = _current_trace.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body = metrics.render().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/healthz":
+            body, content_type = b"ok\n", "text/plain"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(host="127.0.0.1", port=9108):
+    """Startet /metrics in einem Hintergrund-Thread (None, wenn der Port belegt ist)"""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning("Metrik-Endpunkt auf %s:%s nicht verfügbar: %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Metriken unter http://%s:%s/metrics", host, server.server_port)
+    return server
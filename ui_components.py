@@ -1,5 +1,7 @@
 import streamlit as st
 from config import AppConfig
+from image_cache import ImageCache
+from telemetry import metrics
 
 class UIComponents:
     """Klasse für alle UI-Komponenten"""
@@ -7,6 +9,24 @@ class UIComponents:
     def __init__(self):
         self.config = AppConfig()
     
+    @staticmethod
+    @st.cache_resource
+    def get_image_cache():
+        """Vorschaubilder auf der Platte, einmal pro Prozess"""
+        cache = ImageCache(
+            AppConfig.IMAGE_CACHE_DIR,
+            max_bytes=AppConfig.IMAGE_CACHE_MAX_BYTES,
+            width=AppConfig.IMAGE_THUMBNAIL_WIDTH,
+            memory_entries=AppConfig.IMAGE_CACHE_MEMORY_ENTRIES,
+            workers=AppConfig.IMAGE_PREFETCH_WORKERS,
+            timeout=AppConfig.IMAGE_DOWNLOAD_TIMEOUT
+        )
+        metrics.register_collector(lambda: [
+            ("image_cache_lookups_total", "counter", {"result": result}, count)
+            for result, count in cache.stats.items()
+        ] + [("image_cache_bytes", "gauge", {}, cache.size())])
+        return cache
+    
     def render_header(self):
         """Rendert den Header der App"""
         st.title(f"{AppConfig.PAGE_ICON} {AppConfig.PAGE_TITLE}")
@@ -15,17 +35,37 @@ class UIComponents:
         # st.info("💡 Wähle Karten aus und stelle Regelfragen!")
     
     def render_chat_history(self):
-        """Zeigt den gesamten Chat-Verlauf an"""
+        """Zeigt den Chat-Verlauf an (ältere Nachrichten nur auf Wunsch)"""
+        archived = st.session_state.get("archived_messages", [])
+        if archived:
+            # Nur bei aktivem Schalter rendern, sonst kostet jeder Rerun Markdown für alles
+            if st.toggle(f"Älteren Verlauf anzeigen ({len(archived)} Nachrichten)", key="show_archived"):
+                for msg in archived:
+                    with st.chat_message(msg["role"]):
+                        st.markdown(msg["content"])
+            st.divider()
+        
         for msg in st.session_state.messages:
             with st.chat_message(msg["role"]):
                 st.markdown(msg["content"])
     
     def render_card_image(self, card, width=150):
-        """Rendert ein einzelnes Kartenbild"""
-        if 'image_uris' in card:
-            st.image(card['image_uris']['normal'], width=width)
+        """Rendert ein einzelnes Kartenbild (lokales Vorschaubild, sonst Scryfall-URL)"""
+        if card.image_url:
+            # Nie im Render-Pfad laden: solange das Vorschaubild fehlt, lädt der Browser die URL
+            cache = self.get_image_cache()
+            thumbnail = cache.cached(card.id, card.image_url)
+            if thumbnail is None:
+                cache.prefetch([(card.id, card.image_url)])
+            st.image(thumbnail or card.image_url, width=width)
         else:
-            st.info(f"🃏 {card.get('name', 'Unbekannt')}")
+            st.info(f"🃏 {card.name}")
+    
+    def prefetch_images(self, cards):
+        """Lädt die Vorschaubilder neu ausgewählter Karten parallel im Hintergrund"""
+        self.get_image_cache().prefetch(
+            (card.id, card.image_url) for card in cards if card.image_url
+        )
     
     def render_error(self, message):
         """Zeigt eine Fehlermeldung an"""
@@ -0,0 +1,62 @@
+"""Deutsch -> Englisch-Zuordnung der MTG-Begriffe aus MTG_VOCABULARY.
+
+Fragen kommen meist auf Deutsch, das Regelwerk ist englisch. Deutsche
+Begriffe in einer Frage werden deshalb um ihre englischen Entsprechungen
+ergänzt, bevor gesucht wird.
+"""
+import re
+
+VOCABULARY_LINE_PATTERN = re.compile(r"^\s*-\s*(.+?)\s*->\s*(.+?)\s*$")
+# Zusätze wie "Counter (Spell)" gehören nicht zum Begriff
+QUALIFIER_PATTERN = re.compile(r"\s*\([^)]*\)")
+
+
+def parse_vocabulary(text):
+    """Liest "- Englisch -> Deutsch"-Zeilen und gibt {deutsch: [englisch, ...]} zurück"""
+    mapping = {}
+    for line in text.splitlines():
+        match = VOCABULARY_LINE_PATTERN.match(line)
+        if not match:
+            continue
+        english = [QUALIFIER_PATTERN.sub("", t).strip() for t in match.group(1).split("/")]
+        german = [t.strip() for t in match.group(2).split("/")]
+
+        # "Tap / Untap -> Tappen / Enttappen": Paare einzeln zuordnen
+        if len(english) == len(german):
+            pairs = zip(german, english)
+        else:
+            pairs = ((g, e) for g in german for e in english)
+
+        for german_term, english_term in pairs:
+            targets = mapping.setdefault(german_term.lower(), [])
+            if english_term and english_term not in targets:
+                targets.append(english_term)
+    return mapping
+
+
+class QueryExpander:
+    """Ergänzt eine Frage um die englischen Begriffe der enthaltenen deutschen Begriffe"""
+
+    def __init__(self, mapping):
+        self.mapping = mapping
+        # Längste Begriffe zuerst, Endungen ("Kreaturen", "Friedhofs") sind erlaubt
+        terms = sorted(mapping, key=len, reverse=True)
+        self.pattern = re.compile(
+            r"\b(" + "|".join(re.escape(t) for t in terms) + r")\w*",
+            re.IGNORECASE
+        ) if terms else None
+
+    def terms(self, text):
+        """Englische Begriffe zu allen deutschen Begriffen im Text (ohne Duplikate)"""
+        if self.pattern is None:
+            return []
+        found = []
+        for match in self.pattern.finditer(text):
+            for english in self.mapping[match.group(1).lower()]:
+                if english not in found:
+                    found.append(english)
+        return found
+
+    def expand(self, text):
+        terms = self.terms(text)
+        return f"{text} {' '.join(terms)}" if terms else text